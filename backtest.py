@@ -0,0 +1,279 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+import match_stats
+import odds
+from predict import base_outcome_rule, outcome_rule, shots_on_goal
+
+# =====================
+# ARCHIVE
+# =====================
+# An archive is any mix of files/directories holding api-sports /fixtures,
+# /fixtures/statistics and /odds payloads: whole responses ({"parameters",
+# "response": [...]}), plain lists, single objects or JSON-lines, optionally
+# gzipped. A fixture may carry the /fixtures?ids= "statistics" block and an
+# "odds" dict ({"home", "draw", "away"}) as stored by job_morning; otherwise
+# statistics and odds files are joined onto it by fixture id.
+FINISHED = {"FT", "AET", "PEN"}
+EXTENSIONS = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+
+FIXTURE = "fixture"
+STATISTICS = "statistics"
+ODDS = "odds"
+
+LOOK_AHEAD_NOTE = (
+    "shots-on-goal branch uses full-time statistics; the live bot only has "
+    "pre-match data at tip time, so its hit rate is optimistic (look-ahead)"
+)
+
+
+def iter_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith(EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_items(paths):
+    # (item, request parameters) pairs, one file in memory at a time
+    for path in iter_files(paths):
+        with _open(path) as f:
+            if ".jsonl" in path:
+                docs = (json.loads(line) for line in f if line.strip())
+            else:
+                docs = [json.load(f)]
+
+            for doc in docs:
+                params = {}
+                if isinstance(doc, dict) and "response" in doc:
+                    params = doc.get("parameters") or {}
+                    doc = doc["response"]
+                if isinstance(doc, dict):
+                    doc = [doc]
+                for item in doc or []:
+                    yield item, params
+
+
+def classify(item):
+    # Payload kind by item shape; None for anything the backtest can't use
+    if not isinstance(item, dict):
+        return None
+    if "bookmakers" in item and "fixture" in item:
+        return ODDS
+    if "fixture" in item and "teams" in item and "goals" in item:
+        return FIXTURE
+    if "team" in item and "statistics" in item:
+        return STATISTICS
+    return None
+
+
+def result_of(m):
+    home, away = m["goals"]["home"] or 0, m["goals"]["away"] or 0
+    if home == away:
+        return "draw"
+    return "home" if home > away else "away"
+
+
+# =====================
+# COLUMNS
+# =====================
+class Columns:
+    # The archive reduced to the few values the predictors read, one list
+    # per field, so every threshold sweep runs over plain tuples.
+
+    def __init__(self):
+        self.league = []
+        self.result = []
+        self.shots = []
+        self.odds = []
+        self.ht = []
+        self.reds = []
+        self.counts = {}
+
+    def __len__(self):
+        return len(self.result)
+
+    def add(self, m):
+        line = m.get("odds") if usable_odds(m.get("odds")) else None
+        ht = (m.get("score") or {}).get("halftime") or {}
+
+        self.league.append(m["league"].get("name") or str(m["league"]["id"]))
+        self.result.append(result_of(m))
+        self.shots.append(shots_on_goal(m))
+        self.odds.append(line)
+        self.ht.append((ht.get("home"), ht.get("away")))
+        self.reds.append(match_stats.red_cards(m))
+
+
+def usable_odds(line):
+    return bool(line and line.get("home") and line.get("away"))
+
+
+def load_columns(paths, league_ids=None):
+    fixtures = {}              # fixture id -> finished fixture
+    rows = defaultdict(dict)   # fixture id -> team id -> compact statistics row
+    lines = {}                 # fixture id -> odds.summarize() line
+    counts = Counter()
+
+    for item, params in iter_items(paths):
+        kind = classify(item)
+        try:
+            if kind == FIXTURE:
+                if item["fixture"]["status"]["short"] not in FINISHED:
+                    continue
+                if league_ids and item["league"]["id"] not in league_ids:
+                    continue
+                fixtures.setdefault(item["fixture"]["id"], item)
+            elif kind == STATISTICS:
+                fid = int(params["fixture"])
+                team_id = item["team"]["id"]
+                rows[fid][team_id] = match_stats.compact([item], team_id)[0]
+            elif kind == ODDS:
+                line = odds.summarize([item])
+                fid = item["fixture"]["id"]
+                if line and line["books"] > (lines.get(fid) or {}).get("books", 0):
+                    lines[fid] = line
+            else:
+                counts["skipped"] += 1
+        except (KeyError, TypeError, ValueError):
+            counts["skipped"] += 1
+
+    cols = Columns()
+    empty = [None] * len(match_stats.STAT_TYPES)
+    for fid, m in fixtures.items():
+        teams = rows.get(fid)
+        if match_stats.table_for(m) is None and teams:
+            m["stats"] = [teams.get(m["teams"]["home"]["id"], empty), teams.get(m["teams"]["away"]["id"], empty)]
+            counts["statistics_joined"] += 1
+        if not usable_odds(m.get("odds")) and fid in lines:
+            m["odds"] = lines[fid]
+            counts["odds_joined"] += 1
+        cols.add(m)
+
+    cols.counts = dict(counts)
+    return cols
+
+
+# =====================
+# EVALUATION
+# =====================
+def _tally():
+    return defaultdict(lambda: [0, 0])
+
+
+def _report(hits):
+    return {
+        key: {"hits": h, "total": n, "hit_rate": round(h / n, 4) if n else None}
+        for key, (h, n) in sorted(hits.items())
+    }
+
+
+def evaluate_base(cols, seed, draw_band):
+    rng = random.Random(seed)
+    by_league, by_rule, overall = _tally(), _tally(), [0, 0]
+
+    for league, result, shots, odds in zip(cols.league, cols.result, cols.shots, cols.odds):
+        outcome, rule = base_outcome_rule(shots, odds, rng, draw_band)
+        hit = outcome == result
+        for t in (by_league[league], by_rule[rule], overall):
+            t[0] += hit
+            t[1] += 1
+
+    return {
+        "draw_band": draw_band,
+        "overall": _report({"all": overall})["all"],
+        "by_rule": _report(by_rule),
+        "by_league": _report(by_league),
+    }
+
+
+def evaluate_live(cols, seed):
+    rng = random.Random(seed)
+    by_league, by_rule, overall = _tally(), _tally(), [0, 0]
+
+    for league, result, (ht_home, ht_away), (red_home, red_away) in zip(
+        cols.league, cols.result, cols.ht, cols.reds
+    ):
+        if ht_home is None or ht_away is None:
+            continue
+        outcome, rule = outcome_rule(ht_home, ht_away, red_home, red_away, rng)
+        hit = outcome == result
+        for t in (by_league[league], by_rule[rule], overall):
+            t[0] += hit
+            t[1] += 1
+
+    return {
+        "overall": _report({"all": overall})["all"],
+        "by_rule": _report(by_rule),
+        "by_league": _report(by_league),
+    }
+
+
+def print_report(title, report):
+    o = report["overall"]
+    print(f"\n📊 {title} — {o['hits']}/{o['total']} ({(o['hit_rate'] or 0) * 100:.1f}%)")
+    for section in ("by_rule", "by_league"):
+        print(f"  {section.replace('_', ' ')}:")
+        for key, r in report[section].items():
+            print(f"    {key:<28} {r['hits']:>6}/{r['total']:<6} {(r['hit_rate'] or 0) * 100:5.1f}%")
+
+
+# =====================
+# CLI
+# =====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the Phantom tip rules over archived fixtures.")
+    parser.add_argument("paths", nargs="+", help="archive files or directories")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random fallback branches")
+    parser.add_argument("--draw-band", type=int, nargs="+", default=[1],
+                        help="shots-on-goal difference still called a draw (several values sweep)")
+    parser.add_argument("--leagues", type=int, nargs="*", help="only these league ids")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    cols = load_columns(args.paths, set(args.leagues) if args.leagues else None)
+    loaded = time.perf_counter()
+    print(f"Loaded {len(cols)} finished fixtures in {loaded - started:.2f}s "
+          f"(statistics joined: {cols.counts.get('statistics_joined', 0)}, "
+          f"odds joined: {cols.counts.get('odds_joined', 0)}, "
+          f"skipped items: {cols.counts.get('skipped', 0)})")
+
+    report = {
+        "fixtures": len(cols),
+        "sources": cols.counts,
+        "notes": [LOOK_AHEAD_NOTE],
+        "seed": args.seed,
+        "base_outcome": [evaluate_base(cols, args.seed, band) for band in args.draw_band],
+        "live_outcome": evaluate_live(cols, args.seed),
+    }
+
+    for r in report["base_outcome"]:
+        print_report(f"predict_base_outcome (draw band ≤ {r['draw_band']})", r)
+    print_report("predict_outcome (HT score + red cards)", report["live_outcome"])
+    print(f"\n⚠️ Note: {LOOK_AHEAD_NOTE}")
+    print(f"\nEvaluated in {time.perf_counter() - loaded:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from replay import Harness, Recording, synthesize
+
+# =====================
+# BENCH CONFIG
+# =====================
+# Each size runs in its own interpreter: main.py reads its configuration at
+# import time, and a fresh process keeps allocation numbers comparable.
+SIZES = (5, 50, 500, 5000)
+BENCH_DAY = "2026-06-14"
+REPEAT = 5
+ALLOC_SAMPLE_EVERY = 10      # every Nth check tick is traced for allocations
+DEFAULT_THRESHOLD = 1.25     # --compare flags anything this much slower
+
+
+def _stats(samples):
+    samples = sorted(samples) or [0.0]
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+    }
+
+
+def _traced(fn):
+    # (result, peak bytes, bytes still held afterwards)
+    tracemalloc.start()
+    try:
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, current
+
+
+async def _traced_async(coro_fn):
+    tracemalloc.start()
+    try:
+        result = await coro_fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, current
+
+
+def _micro(name, n, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    _, peak, _ = _traced(fn)
+    return {"bench": name, "n": n, **_stats(samples), "alloc_peak_kb": round(peak / 1024, 1), "api_calls": 0}
+
+
+# =====================
+# ONE SIZE
+# =====================
+async def bench_size(recording, n, repeat, step):
+    results = []
+    quiet = open(os.devnull, "w")
+
+    async with Harness(recording, step=step, speed=0) as h:
+        main = h.main
+        main.MAX_MATCHES_PER_DAY = n
+        # Measure the code, not the plan: no quota deferrals at 5000 matches
+        h.standin.daily_limit = 10 ** 7
+        fixtures = [recording.fixture_at(fid, recording.start) for fid in recording.fixtures]
+
+        # ----- pure CPU paths, no I/O -----
+        results.append(_micro(
+            "match_importance_score", n,
+            lambda: [main.match_importance_score(m) for m in fixtures], repeat
+        ))
+        results.append(_micro(
+            "ranking_top", n,
+            lambda: main.RANKING.top(fixtures, main.MAX_MATCHES_PER_DAY), repeat
+        ))
+
+        # ----- job_morning: fixtures, ranking, odds, state, one send -----
+        h.clock.current = recording.start.replace(hour=main.MORNING_HOUR_UTC, minute=0)
+        calls = h.standin.total_calls
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(quiet):
+            await main.job_morning()
+        morning_seconds = time.perf_counter() - started
+        results.append({
+            "bench": "job_morning", "n": n, **_stats([morning_seconds]),
+            "api_calls": h.standin.total_calls - calls,
+        })
+
+        matches = (await main.store.get())["matches"]
+        stored_odds = {s["match_id"]: s["odds"] for s in matches}
+        with_odds = [dict(m, odds=stored_odds.get(str(m["fixture"]["id"]), {})) for m in fixtures]
+
+        results.append(_micro(
+            "predict_base_outcome", n,
+            lambda: [main.predict_base_outcome(m) for m in with_odds], repeat
+        ))
+
+        def render():
+            for s in matches:
+                main.build_header("PRE-MATCH ANALYSIS", s["match_number"], n, s["league"], s["home"], s["away"])
+                main.build_prediction(s)
+                main.format_odds(s)
+
+        results.append(_micro("render_messages", n, render, repeat))
+
+        # ----- job_check over the whole day -----
+        latencies, peaks = [], []
+        calls = h.standin.total_calls
+        ticks = 0
+        with contextlib.redirect_stdout(quiet):
+            while h.clock.now() < recording.end:
+                if ticks % ALLOC_SAMPLE_EVERY == 0:
+                    _, peak, _ = await _traced_async(main.job_check)
+                    peaks.append(peak)
+                else:
+                    started = time.perf_counter()
+                    await main.job_check()
+                    latencies.append(time.perf_counter() - started)
+                ticks += 1
+                h.clock.advance(step)
+
+        results.append({
+            "bench": "job_check", "n": n, **_stats(latencies),
+            "ticks": ticks,
+            "alloc_peak_kb": round(max(peaks, default=0) / 1024, 1),
+            "alloc_peak_kb_median": round(statistics.median(peaks) / 1024, 1) if peaks else 0,
+            "api_calls": h.standin.total_calls - calls,
+            "api_calls_per_tick": round((h.standin.total_calls - calls) / max(ticks, 1), 3),
+            "state_writes": main.store.writes,
+            "sends": len(h.telegram.sent),
+        })
+
+    quiet.close()
+    return results
+
+
+def run_worker(args):
+    random.seed(args.seed)
+    if args.recording:
+        recording = Recording.load(args.recording)
+        n = len(recording.fixtures)
+    else:
+        n = args.worker
+        recording = Recording(synthesize(n, BENCH_DAY, args.seed))
+
+    results = asyncio.run(bench_size(recording, n, args.repeat, args.step))
+    with open(args.worker_out, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+    return 0
+
+
+# =====================
+# DRIVER
+# =====================
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_sizes(args):
+    sizes = [None] if args.recording else args.sizes
+    results = []
+    for n in sizes:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            out = tmp.name
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(n or 0), "--worker-out", out,
+               "--repeat", str(args.repeat), "--step", str(args.step), "--seed", str(args.seed)]
+        if args.recording:
+            cmd += ["--recording", args.recording]
+
+        print(f"⏱️ Benchmarking {n or args.recording} ...", flush=True)
+        try:
+            subprocess.run(cmd, check=True, env={**os.environ, "METRICS_FILE": ""})
+            with open(out, encoding="utf-8") as f:
+                results.extend(json.load(f))
+        finally:
+            os.unlink(out)
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "repeat": args.repeat,
+            "step": args.step,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def print_table(report):
+    print(f"\n{'bench':<24}{'n':>6}{'median ms':>12}{'p95 ms':>10}{'alloc KB':>10}{'API calls':>11}")
+    for r in report["results"]:
+        alloc = f"{r['alloc_peak_kb']:.1f}" if "alloc_peak_kb" in r else "-"
+        print(f"{r['bench']:<24}{r['n']:>6}{r['median_ms']:>12.3f}{r['p95_ms']:>10.3f}"
+              f"{alloc:>10}{r['api_calls']:>11}")
+
+
+def compare(base, report, threshold):
+    # Regressions: slower median beyond threshold or more API calls
+    previous = {(r["bench"], r["n"]): r for r in base["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = previous.get((r["bench"], r["n"]))
+        if old is None:
+            continue
+        if old["median_ms"] and r["median_ms"] > old["median_ms"] * threshold:
+            regressions.append(f"{r['bench']} n={r['n']}: {old['median_ms']} → {r['median_ms']} ms")
+        if r["api_calls"] > old["api_calls"]:
+            regressions.append(f"{r['bench']} n={r['n']}: {old['api_calls']} → {r['api_calls']} API calls")
+    return regressions
+
+
+# =====================
+# CLI
+# =====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the morning/check hot paths at several match counts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="match counts to benchmark")
+    parser.add_argument("--recording", help="benchmark a replay recording instead of synthetic days")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per micro-benchmark")
+    parser.add_argument("--step", type=int, default=120, help="simulated seconds between check ticks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json", help="machine-readable results")
+    parser.add_argument("--compare", help="earlier results file; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown factor counted as a regression")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        return run_worker(args)
+
+    report = run_sizes(args)
+    print_table(report)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s)")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
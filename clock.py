@@ -0,0 +1,13 @@
+import asyncio
+from datetime import datetime, timezone
+
+# Every "what time is it" and every scheduler sleep in the jobs goes through
+# here so a replay can swap in a simulated clock.
+
+
+def now():
+    return datetime.now(timezone.utc)
+
+
+async def sleep(seconds):
+    await asyncio.sleep(seconds)
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+from datetime import timezone, timedelta
+
+# =====================
+# TARGET CONFIG
+# =====================
+# TELEGRAM_TARGETS_FILE points at a JSON list such as
+#   [{"chat_id": -100123, "tz": "IST"}, {"chat_id": -100456, "tz": "UTC", "per_minute": 10}]
+# Without it every message goes to the single channel the script was given.
+TIMEZONES = {
+    "IST": timezone(timedelta(hours=5, minutes=30)),
+    "UTC": timezone.utc,
+}
+DEFAULT_TZ = "IST"
+
+
+def load_targets(default_chat_id):
+    path = os.environ.get("TELEGRAM_TARGETS_FILE")
+    if not path:
+        return [{"chat_id": default_chat_id, "tz": DEFAULT_TZ}]
+
+    with open(path) as f:
+        raw = json.load(f)
+
+    targets = []
+    for t in raw:
+        tz = t.get("tz", DEFAULT_TZ)
+        if tz not in TIMEZONES:
+            raise ValueError(f"Unknown tz {tz!r} for target {t['chat_id']}")
+        targets.append({
+            "chat_id": int(t["chat_id"]),
+            "tz": tz,
+            "per_minute": t.get("per_minute")
+        })
+    return targets
+
+
+def format_key(target):
+    # Targets sharing a key get the exact same rendered text
+    return target["tz"]
+
+
+def format_for(target):
+    return {"tz": target["tz"], "tzinfo": TIMEZONES[target["tz"]]}
+
+
+# =====================
+# FAN-OUT
+# =====================
+class FanOut:
+    # Renders a message once per distinct target format and sends it to all
+    # targets concurrently through one SendQueue (one client connection).
+
+    def __init__(self, sender, targets):
+        self.sender = sender
+        self.targets = targets
+        for t in targets:
+            if t.get("per_minute"):
+                sender.configure_chat(t["chat_id"], t["per_minute"])
+
+    def render(self, message):
+        # message is either plain text or a callable taking the target format
+        if not callable(message):
+            return {format_key(t): message for t in self.targets}
+
+        rendered = {}
+        for t in self.targets:
+            key = format_key(t)
+            if key not in rendered:
+                rendered[key] = message(format_for(t))
+        return rendered
+
+    async def send(self, message, **kwargs):
+        # Returns {chat_id: "ok" | "failed: ..."}; raises only if every target failed
+        status, _ = await self.publish(message, **kwargs)
+        return status
+
+    async def publish(self, message, ids=None, **kwargs):
+        # Edits the message already posted to a target (ids maps chat_id to
+        # message id) and posts to the others. Returns (status, ids).
+        ids = dict(ids or {})
+        rendered = self.render(message)
+
+        def deliver(t):
+            text = rendered[format_key(t)]
+            message_id = ids.get(str(t["chat_id"]))
+            if message_id is not None:
+                return self.sender.edit(t["chat_id"], message_id, text, **kwargs)
+            return self.sender.send(t["chat_id"], text, **kwargs)
+
+        results = await asyncio.gather(*(deliver(t) for t in self.targets), return_exceptions=True)
+
+        status = {}
+        errors = []
+        for t, r in zip(self.targets, results):
+            if isinstance(r, BaseException):
+                errors.append(r)
+                status[str(t["chat_id"])] = f"failed: {type(r).__name__}"
+                print(f"⚠️ Delivery to {t['chat_id']} failed: {r!r}")
+            else:
+                status[str(t["chat_id"])] = "ok"
+                if getattr(r, "id", None) is not None:
+                    ids[str(t["chat_id"])] = r.id
+
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        return status, ids
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+
+import clock
+from state_store import read_json, write_atomic
+
+# =====================
+# CACHE CONFIG
+# =====================
+FIXTURE_CACHE_FILE = os.environ.get("FIXTURE_CACHE_FILE", "fixture_cache.json")
+
+TTL_PAST_SECONDS = 7 * 24 * 3600
+TTL_TODAY_SECONDS = 10 * 60
+TTL_FUTURE_SECONDS = 60 * 60
+# A league with nothing left to play today (no fixtures, or all of them
+# settled) will not change before the day is over
+TTL_SETTLED_SECONDS = 6 * 3600
+SETTLED_STATUSES = {"FT", "AET", "PEN", "PST", "CANC", "ABD", "AWD", "WO"}
+# Expired entries are kept this long as a fallback for when the API quota
+# is exhausted
+STALE_KEEP_SECONDS = 2 * 24 * 3600
+
+# A league= query returns a few KB instead of the whole day's worldwide
+# fixtures, but costs one request per league. Only worth it when just a
+# handful of leagues are stale and we already know their current season.
+# Because settled leagues keep their entry longer (TTL_SETTLED_SECONDS),
+# today's refreshes usually only concern the leagues still playing.
+LEAGUE_QUERY_MAX = int(os.environ.get("FIXTURE_LEAGUE_QUERY_MAX", "2"))
+
+
+def ttl_for(date_str, now=None, fixtures=None):
+    now = now or clock.now()
+    today = now.strftime("%Y-%m-%d")
+    if date_str < today:
+        return TTL_PAST_SECONDS
+    if date_str == today:
+        if fixtures is not None and all(
+            m["fixture"]["status"].get("short") in SETTLED_STATUSES for m in fixtures
+        ):
+            return TTL_SETTLED_SECONDS
+        return TTL_TODAY_SECONDS
+    return TTL_FUTURE_SECONDS
+
+
+# =====================
+# FIXTURE CACHE
+# =====================
+class FixtureCache:
+    # Entries are keyed "<date>:<league id>" and hold only the fixtures of
+    # that league, so an empty list is a valid (cached) answer.
+
+    def __init__(self, path=FIXTURE_CACHE_FILE):
+        self.path = path
+        data = read_json(path) or {}
+        self.entries = data.get("entries", {})
+        self.seasons = data.get("seasons", {})
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key, now):
+        entry = self.entries.get(key)
+        return entry is not None and now < entry["expires"]
+
+    def lookup(self, date_str, league_ids):
+        # Returns (cached fixtures, stale league ids)
+        now = clock.now().timestamp()
+        fixtures = []
+        stale = []
+        for league_id in sorted(league_ids):
+            key = f"{date_str}:{league_id}"
+            if self._fresh(key, now):
+                fixtures.extend(self.entries[key]["fixtures"])
+            else:
+                stale.append(league_id)
+        return fixtures, stale
+
+    def stale(self, date_str, league_ids):
+        # Whatever is cached for the date, expired or not
+        fixtures = []
+        for league_id in sorted(league_ids):
+            entry = self.entries.get(f"{date_str}:{league_id}")
+            if entry is not None:
+                fixtures.extend(entry["fixtures"])
+        return fixtures
+
+    def store(self, date_str, league_ids, fixtures):
+        now = clock.now()
+        by_league = {league_id: [] for league_id in league_ids}
+        for m in fixtures:
+            league_id = m["league"]["id"]
+            if league_id in by_league:
+                by_league[league_id].append(m)
+                if m["league"].get("season"):
+                    self.seasons[str(league_id)] = m["league"]["season"]
+
+        for league_id, items in by_league.items():
+            expires = now.timestamp() + ttl_for(date_str, now, items)
+            self.entries[f"{date_str}:{league_id}"] = {"expires": expires, "fixtures": items}
+
+    def prune(self):
+        now = clock.now().timestamp()
+        self.entries = {k: v for k, v in self.entries.items() if v["expires"] + STALE_KEEP_SECONDS > now}
+
+    def save(self):
+        self.prune()
+        write_atomic(self.path, json.dumps({"entries": self.entries, "seasons": self.seasons}))
+
+    async def get(self, date_str, league_ids, fetch_date, fetch_league):
+        # fetch_date(date) -> all fixtures that day,
+        # fetch_league(date, league, season) -> fixtures of one league
+        cached, stale = self.lookup(date_str, league_ids)
+        if not stale:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        seasons = [self.seasons.get(str(league_id)) for league_id in stale]
+
+        if len(stale) <= LEAGUE_QUERY_MAX and all(seasons):
+            responses = await asyncio.gather(*(
+                fetch_league(date_str, league_id, season)
+                for league_id, season in zip(stale, seasons)
+            ))
+            fetched = [m for r in responses for m in r]
+        else:
+            fetched = await fetch_date(date_str)
+
+        self.store(date_str, stale, fetched)
+        stale = set(stale)
+        return cached + [m for m in fetched if m["league"]["id"] in stale]
@@ -0,0 +1,139 @@
+import json
+import re
+
+# =====================
+# STREAMING FIXTURES
+# =====================
+# A worldwide /fixtures?date= answer is megabytes of fixtures from hundreds
+# of leagues, of which we keep a handful. Instead of loading the whole body
+# with json.loads, the "response" array is scanned as the chunks arrive:
+# each element's bytes are cut out by bracket matching, its league id is
+# read with a regex, and only fixtures of allowed leagues are decoded and
+# projected down to the fields job_morning uses.
+
+_TEXT = rb'[^"\[\]{}]*'
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+# Skips plain bytes and complete strings, stops at the next bracket; an
+# opening quote as the group means the string continues in the next chunk
+_NEXT = re.compile(_TEXT + rb'(?:' + _STRING + _TEXT + rb')*([\[\]{}"])')
+
+
+def _nested(levels):
+    # Balanced brackets up to `levels` deep, in "unrolled loop" form so a
+    # failed match (an element cut off at the end of a chunk) cannot
+    # backtrack exponentially
+    body = _TEXT + rb'(?:' + _STRING + _TEXT + rb')*'
+    for _ in range(levels):
+        body = _TEXT + rb'(?:(?:' + _STRING + rb'|[\[{]' + body + rb'[\]}])' + _TEXT + rb')*'
+    return body
+
+
+# One whole array element in a single C-level match; anything deeper or
+# cut off by the chunk boundary goes through the bracket-by-bracket path
+_ELEMENT = re.compile(rb'[\s,]*(\{' + _nested(4) + rb'\})')
+_LEAGUE_ID = re.compile(rb'"league"\s*:\s*\{\s*"id"\s*:\s*(\d+)')
+_OPEN = frozenset(b"[{")
+
+
+class ArrayScanner:
+    # feed(chunk) -> raw bytes of every complete object in the top-level
+    # `key` array finished by that chunk
+
+    def __init__(self, key="response"):
+        self._key = re.compile(rb'"' + re.escape(key.encode()) + rb'"\s*:\s*\Z')
+        self.buf = b""
+        self.pos = 0        # next byte to scan, just past the last bracket
+        self.start = None   # start of the element being collected
+        self.depth = 0
+        self.in_array = False
+
+    def feed(self, chunk):
+        buf = self.buf = self.buf + chunk
+        items = []
+        depth, pos = self.depth, self.pos
+
+        while True:
+            if depth == 2 and self.in_array and self.start is None:
+                m = _ELEMENT.match(buf, pos)
+                if m is not None:
+                    items.append(m.group(1))
+                    pos = m.end()
+                    continue
+
+            m = _NEXT.match(buf, pos)
+            if m is None or m.group(1) == b'"':
+                break
+            i = m.end() - 1
+            c = buf[i]
+            if c in _OPEN:
+                if depth == 1 and c == 0x5B and self._key.search(buf, pos, i):
+                    self.in_array = True
+                elif depth == 2 and self.in_array and c == 0x7B:
+                    self.start = i
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 2 and self.start is not None:
+                    items.append(buf[self.start:i + 1])
+                    self.start = None
+                elif depth == 1:
+                    self.in_array = False
+            pos = i + 1
+
+        # Keep only what a later chunk still needs
+        keep = pos if self.start is None else self.start
+        self.buf = buf[keep:]
+        self.pos = pos - keep
+        if self.start is not None:
+            self.start = 0
+        self.depth = depth
+        return items
+
+    def close(self):
+        if self.depth or self.buf[self.pos:].strip():
+            raise ValueError("truncated JSON response")
+
+
+def league_id(raw):
+    m = _LEAGUE_ID.search(raw)
+    return int(m.group(1)) if m else None
+
+
+def project(m):
+    # The fields job_morning, the ranking and the fixture cache read
+    fixture, league, teams = m["fixture"], m["league"], m["teams"]
+    status = fixture.get("status") or {}
+    return {
+        "fixture": {
+            "id": fixture["id"],
+            "date": fixture["date"],
+            "status": {"short": status.get("short"), "elapsed": status.get("elapsed")},
+        },
+        "league": {"id": league["id"], "name": league["name"], "season": league.get("season")},
+        "teams": {
+            side: {"id": teams[side]["id"], "name": teams[side]["name"]}
+            for side in ("home", "away")
+        },
+    }
+
+
+def parser(league_ids):
+    # An http_client parse= callback: {"response": [projected fixtures]}
+    # with only the fixtures whose league is in league_ids
+    async def parse(chunks):
+        scanner = ArrayScanner("response")
+        kept = []
+        async for chunk in chunks:
+            for raw in scanner.feed(chunk):
+                lid = league_id(raw)
+                if lid is not None and lid not in league_ids:
+                    continue
+                m = json.loads(raw)
+                if m["league"]["id"] in league_ids:
+                    kept.append(project(m))
+        scanner.close()
+        return {"response": kept}
+
+    return parse
+
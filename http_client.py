@@ -0,0 +1,132 @@
+import json
+import os
+import re
+from urllib.parse import urlsplit
+
+import metrics
+
+# =====================
+# HTTP CONFIG
+# =====================
+FOOTBALL_API_URL = os.environ.get("FOOTBALL_API_URL", "https://v3.football.api-sports.io")
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+
+POOL_LIMIT = 20
+POOL_LIMIT_PER_HOST = 6
+KEEPALIVE_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 15
+
+_session = None
+
+
+# =====================
+# SHARED SESSION
+# =====================
+def get_session():
+    # One keep-alive pool per process, created lazily inside the running loop.
+    # aiohttp is imported here too, so runs that never talk HTTP skip it.
+    import aiohttp
+
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_SECONDS,
+            ttl_dns_cache=300
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=_timeout(None))
+    return _session
+
+
+async def close():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _timeout(seconds):
+    import aiohttp
+
+    seconds = DEFAULT_TIMEOUT_SECONDS if seconds is None else seconds
+    return aiohttp.ClientTimeout(total=seconds, connect=min(5, seconds))
+
+
+def _params(params):
+    if not params:
+        return None
+    return {k: str(v) for k, v in params.items()}
+
+
+# =====================
+# REQUESTS
+# =====================
+def _endpoint(url):
+    # Metric label: the URL path with ids (gist ids, numbers) collapsed
+    path = urlsplit(url).path
+    return re.sub(r"/(?:[0-9a-f]{16,}|\d+)(?=/|$)", "/:id", path) or "/"
+
+
+async def _read_json(r, endpoint):
+    body = await r.read()
+    metrics.inc("bytes_downloaded", len(body), endpoint=endpoint)
+    return json.loads(body) if body else None
+
+
+async def _iter_body(r, endpoint):
+    # The body chunk by chunk as it arrives, for streaming parsers
+    async for chunk in r.content.iter_any():
+        metrics.inc("bytes_downloaded", len(chunk), endpoint=endpoint)
+        yield chunk
+
+
+async def get_json(url, headers=None, params=None, timeout=None):
+    endpoint = _endpoint(url)
+    metrics.inc("api_calls", endpoint=endpoint)
+    session = get_session()
+    with metrics.span("http", endpoint=endpoint):
+        async with session.get(url, headers=headers, params=_params(params), timeout=_timeout(timeout)) as r:
+            r.raise_for_status()
+            return await _read_json(r, endpoint)
+
+
+async def patch_json(url, payload, headers=None, timeout=None):
+    endpoint = _endpoint(url)
+    metrics.inc("api_calls", endpoint=endpoint)
+    session = get_session()
+    with metrics.span("http", endpoint=endpoint):
+        async with session.patch(url, headers=headers, json=payload, timeout=_timeout(timeout)) as r:
+            r.raise_for_status()
+            return await _read_json(r, endpoint)
+
+
+async def get_json_conditional(url, etag=None, headers=None, params=None, timeout=None):
+    # Returns (data, etag); data is None when the server answered 304
+    headers = dict(headers or {})
+    if etag:
+        headers["If-None-Match"] = etag
+
+    endpoint = _endpoint(url)
+    metrics.inc("api_calls", endpoint=endpoint)
+    session = get_session()
+    with metrics.span("http", endpoint=endpoint):
+        async with session.get(url, headers=headers, params=_params(params), timeout=_timeout(timeout)) as r:
+            if r.status == 304:
+                return None, etag
+            r.raise_for_status()
+            return await _read_json(r, endpoint), r.headers.get("ETag")
+
+
+async def get_json_with_headers(url, headers=None, params=None, timeout=None, parse=None):
+    # Returns (data, response headers) for callers that track rate limits.
+    # parse(chunks) -> data replaces json.loads on the whole body.
+    endpoint = _endpoint(url)
+    metrics.inc("api_calls", endpoint=endpoint)
+    session = get_session()
+    with metrics.span("http", endpoint=endpoint):
+        async with session.get(url, headers=headers, params=_params(params), timeout=_timeout(timeout)) as r:
+            r.raise_for_status()
+            if parse is not None:
+                return await parse(_iter_body(r, endpoint)), r.headers
+            return await _read_json(r, endpoint), r.headers
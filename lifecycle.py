@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+# =====================
+# MATCH PHASES
+# =====================
+# UPCOMING -> ALERTED -> PRE_SENT -> LIVE -> HT_DONE -> FINISHED
+#
+# Each match stores its phase, the epoch second it next needs attention
+# ("wake_at", None once finished) and a transition log of
+# [epoch, phase, reason] entries that a replay can diff.
+UPCOMING = "UPCOMING"
+ALERTED = "ALERTED"
+PRE_SENT = "PRE_SENT"
+LIVE = "LIVE"
+HT_DONE = "HT_DONE"
+FINISHED = "FINISHED"
+
+ALERT_WINDOW = (60, 90)      # minutes before kickoff
+PRE_WINDOW = (0, 35)         # minutes before kickoff
+HT_LATEST_ELAPSED = 55       # a 2H status up to this minute still gets the HT update
+FT_ELAPSED = 88              # 2H minute at which the tip is settled
+LIVE_WINDOW = timedelta(hours=2, minutes=30)
+HARD_STOP = timedelta(hours=4)
+
+IN_PLAY_STATUSES = {"1H", "HT", "2H", "ET", "BT", "P", "SUSP", "INT", "LIVE"}
+FINISHED_STATUSES = {"FT", "AET", "PEN"}
+ABANDONED_STATUSES = {"PST", "CANC", "ABD", "AWD", "WO"}
+
+
+def parse_kickoff(m):
+    return datetime.fromisoformat(m["kickoff"].replace("Z", "+00:00"))
+
+
+def kickoff_ts(m):
+    return parse_kickoff(m).timestamp()
+
+
+# =====================
+# WAKE-UP TIMES
+# =====================
+def next_wake(m, now_ts, status=None, elapsed=None, follow=False):
+    phase = m["phase"]
+    kickoff = kickoff_ts(m)
+
+    if phase == FINISHED:
+        return None
+    # Deadlines already in the past simply mean "due"
+    if phase == UPCOMING:
+        return kickoff - ALERT_WINDOW[1] * 60
+    if phase == ALERTED:
+        return kickoff - PRE_WINDOW[1] * 60
+    if phase == PRE_SENT:
+        return kickoff
+
+    # In play: sleep through the minutes where nothing can change for us,
+    # otherwise stay due on every tick. Kickoff is used as the "due" value
+    # so a polled match does not rewrite its wake-up time each tick.
+    # follow=True (a live board showing the score) keeps it due throughout.
+    if follow:
+        return kickoff
+
+    remaining = 0
+    if phase == LIVE and status == "1H" and elapsed is not None:
+        remaining = 44 - elapsed
+    elif phase == HT_DONE and status == "2H" and elapsed is not None:
+        remaining = FT_ELAPSED - elapsed
+    if remaining >= 2:
+        return now_ts + remaining * 60
+    return kickoff
+
+
+def is_due(m, now_ts):
+    wake = m.get("wake_at")
+    return wake is not None and wake <= now_ts
+
+
+# =====================
+# TRANSITIONS
+# =====================
+def new_match(**fields):
+    m = dict(fields)
+    m.update({"phase": UPCOMING, "wake_at": None, "log": []})
+    m["wake_at"] = next_wake(m, None)
+    return m
+
+
+def transition(store, m, phase, now_ts, reason=""):
+    log = list(m.get("log", []))
+    log.append([int(now_ts), phase, reason])
+    store.set(m, "log", log)
+    store.set(m, "phase", phase)
+    print(f"🔀 {m['home']} vs {m['away']}: {phase}" + (f" ({reason})" if reason else ""))
+
+
+def migrate(store, m, now_ts):
+    # State written before phases existed only has the boolean flags
+    if "phase" in m:
+        return
+    if m.get("ft"):
+        phase = FINISHED
+    elif m.get("ht"):
+        phase = HT_DONE
+    elif m.get("pre"):
+        phase = PRE_SENT
+    elif m.get("alert"):
+        phase = ALERTED
+    else:
+        phase = UPCOMING
+
+    for flag in ("alert", "pre", "ht", "ft", "day_summary_sent"):
+        m.pop(flag, None)
+    transition(store, m, phase, now_ts, "migrated from flags")
+    store.set(m, "wake_at", next_wake(m, now_ts))
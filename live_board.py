@@ -0,0 +1,141 @@
+import hashlib
+import os
+
+import lifecycle
+
+# =====================
+# BOARD CONFIG
+# =====================
+# LIVE_BOARD=match: the PRE-MATCH post of each match becomes its board and
+#   is edited with the score, then with the HT and FT updates.
+# LIVE_BOARD=day: PRE posts stay as they are; HT/FT updates and scores go
+#   into one combined board for the day.
+# Anything else keeps posting every update as a new message.
+LIVE_BOARD = os.environ.get("LIVE_BOARD", "off").lower()
+MATCH = "match"
+DAY = "day"
+ABSORBED_EVENTS = {MATCH: {"pre", "ht", "ft"}, DAY: {"ht", "ft"}}
+
+
+def enabled():
+    return LIVE_BOARD in ABSORBED_EVENTS
+
+
+def absorbs(event):
+    return event in ABSORBED_EVENTS.get(LIVE_BOARD, ())
+
+
+def mark(store, m):
+    # "board_pending" lives in the state file, so an edit that fails (or a
+    # run that dies before flushing) is retried by the next tick, whichever
+    # process runs it. Boards are flushed once per tick, so each board
+    # message gets at most one edit per tick.
+    store.set(m, "board_pending", True)
+
+
+def pending(state):
+    return enabled() and any(m.get("board_pending") for m in state.get("matches", []))
+
+
+# =====================
+# UPDATES
+# =====================
+def note(store, m, text):
+    # A PRE/HT/FT message that would have been posted becomes the body of
+    # the match board (the day board is built from match state alone)
+    if LIVE_BOARD == MATCH:
+        store.set(m, "board_text", text)
+    mark(store, m)
+
+
+def track(store, m, live_match):
+    # Score and status as shown on the board; the minute is only refreshed
+    # along with them so a quiet spell costs no edits
+    if not enabled() or not live_match:
+        return
+    status = live_match["fixture"]["status"]
+    snapshot = [
+        live_match["goals"]["home"] or 0,
+        live_match["goals"]["away"] or 0,
+        status["short"],
+        status.get("elapsed"),
+    ]
+    previous = m.get("board_live")
+    if previous is None or previous[:3] != snapshot[:3]:
+        store.set(m, "board_live", snapshot)
+        mark(store, m)
+
+
+# =====================
+# RENDERING
+# =====================
+def score_line(m):
+    home_goals, away_goals, status, elapsed = m["board_live"]
+    if m["phase"] == lifecycle.FINISHED:
+        when = "FT"
+    elif elapsed and status in lifecycle.IN_PLAY_STATUSES:
+        when = f"{status} {elapsed}'"
+    else:
+        when = status
+    return f"{m['home']} {home_goals} - {away_goals} {m['away']} · {when}"
+
+
+def render_match(m, base):
+    if m.get("board_live") and m["phase"] != lifecycle.FINISHED:
+        return f"{base.rstrip()}\n\n🔴 LIVE: {score_line(m)}"
+    return base
+
+
+def render_day(state):
+    lines = ["📋 LIVE BOARD", ""]
+    for m in state["matches"]:
+        if m["phase"] == lifecycle.FINISHED:
+            icon = {True: "✅", False: "❌"}.get(m.get("success"), "➖")
+        elif m.get("board_live"):
+            icon = "🔴"
+        else:
+            icon = "⏳"
+
+        if m.get("board_live"):
+            line = f"{icon} {m['match_number']}. {score_line(m)}"
+        else:
+            kickoff = lifecycle.parse_kickoff(m).strftime("%H:%M UTC")
+            line = f"{icon} {m['match_number']}. {m['home']} vs {m['away']} · {kickoff}"
+        if m.get("ht_draw_advised"):
+            line += " · 🤝 Draw hedge"
+        lines.append(line)
+
+    lines += ["", "🕶️ Phantom Time"]
+    return "\n".join(lines)
+
+
+def digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# =====================
+# FLUSH
+# =====================
+async def flush(store, state, publish, base_for):
+    # publish(text, ids) -> (status, ids) posts or edits; base_for(m) is the
+    # text a match board starts from before any PRE/HT/FT note
+    if not pending(state):
+        return
+    marked = [m for m in state["matches"] if m.get("board_pending")]
+
+    if LIVE_BOARD == DAY:
+        boards = [(state, render_day(state), marked)]
+    else:
+        boards = [(m, render_match(m, m.get("board_text") or base_for(m)), [m]) for m in marked]
+
+    for holder, text, covered in boards:
+        if digest(text) != holder.get("board_digest"):
+            try:
+                _, ids = await publish(text, holder.get("board_ids"))
+            except Exception as e:
+                print(f"⚠️ Board update failed, retrying next tick: {e!r}")
+                continue
+            store.set(holder, "board_ids", ids)
+            store.set(holder, "board_digest", digest(text))
+        for m in covered:
+            store.set(m, "board_pending", False)
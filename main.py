@@ -1,58 +1,51 @@
 import asyncio
 import random
-import requests
-import json
 import os
-from datetime import datetime, timezone , timedelta
-from telethon import TelegramClient
+from datetime import timedelta
+
+# Telethon, aiohttp and postmatch are imported where they are used: a
+# `check` tick with nothing due exits before loading any of them
+import clock
+import http_client
+from http_client import FOOTBALL_API_URL
+from state_store import StateStore, read_json
+from fanout import FanOut, load_targets
+from fixture_cache import FixtureCache
+import fixture_stream
+from ranking import Ranking
+from predict import predict_base_outcome
+import lifecycle
+import live_board
+import match_stats
+import metrics
+import odds
+import quota
+from quota import QuotaManager
+from lifecycle import parse_kickoff
+from scheduler import Scheduler, MORNING, HEARTBEAT, LIVE_TIPS
 
 api_id = int(os.environ["TELEGRAM_API_ID"])
 api_hash = os.environ["TELEGRAM_API_HASH"]
 channel_id = int(os.environ["TELEGRAM_CHANNEL_ID"])
 API_KEY = os.environ["FOOTBALL_API_KEY"]
-GIST_ID = os.environ.get("GIST_ID")
-GH_TOKEN = os.environ.get("GH_TOKEN")
 TELEGRAM_BOT_TOKEN = os.environ["TELEGRAM_BOT_TOKEN"]
+# Reusing the bot's auth key skips the key exchange on every run. A string
+# session (for runners without a persistent disk) wins over the file.
+TELEGRAM_BOT_SESSION = os.environ.get("TELEGRAM_BOT_SESSION", "phantom_bot")
+TELEGRAM_BOT_SESSION_STRING = os.environ.get("TELEGRAM_BOT_SESSION_STRING")
 
-LEAGUE_PRIORITY = {
-    # INTERNATIONAL
-    1: 100,    # FIFA World Cup
-    4: 98,     # UEFA Euro
-    9: 96,     # Copa America
-    5: 94,     # UEFA Nations League
-
-    # CLUB
-    2: 92,     # UEFA Champions League
-    3: 90,     # UEFA Europa League
-    39: 88,    # Premier League
-    140: 86,   # La Liga
-    135: 84,   # Serie A
-    78: 82,    # Bundesliga
-}
-def match_importance_score(match):
-    league_id = match["league"]["id"]
-    league_score = LEAGUE_PRIORITY.get(league_id, 0)
-
-    home = match["teams"]["home"]["name"]
-    away = match["teams"]["away"]["name"]
-
-    # Extra boost for big clubs
-    big_clubs = [
-        "Real Madrid", "Barcelona", "Manchester United",
-        "Manchester City", "Liverpool", "Arsenal",
-        "Bayern Munich", "PSG", "Juventus", "AC Milan",
-        "Inter", "Chelsea"
-    ]
+# League priorities and big-club boosts live in ranking.json
+RANKING = Ranking.from_file()
+LEAGUE_PRIORITY = RANKING.league_priority
+MAX_MATCHES_PER_DAY = 5
 
-    club_boost = 0
-    if home in big_clubs:
-        club_boost += 5
-    if away in big_clubs:
-        club_boost += 5
 
-    return league_score + club_boost
+def match_importance_score(match):
+    return RANKING.score(match)
 
-MAJOR_LEAGUE_IDS = set(LEAGUE_PRIORITY.keys())
+MAJOR_LEAGUE_IDS = RANKING.league_ids
+# Worldwide date responses are streamed; only these leagues are decoded
+parse_fixtures = fixture_stream.parser(MAJOR_LEAGUE_IDS)
 
 
 # =====================
@@ -105,57 +98,53 @@ HT_LOSING_LINES = [
 
 
 # =====================
-# GIST STATE
+# STATE
 # =====================
-def load_state():
-    if not GIST_ID or not GH_TOKEN:
-        return {"matches": [], "date": None}
+store = StateStore()
+api_budget = QuotaManager()
 
-    url = f"https://api.github.com/gists/{GIST_ID}"
-    headers = {"Authorization": f"token {GH_TOKEN}"}
-    r = requests.get(url, headers=headers, timeout=10)
-    r.raise_for_status()
 
-    files = r.json().get("files", {})
-    if "match_state.json" not in files:
-        raise RuntimeError("match_state.json missing in Gist")
-
-    return json.loads(files["match_state.json"]["content"])
+# =====================
+# FOOTBALL API
+# =====================
+async def fetch_fixtures_by_date(date_str, league=None, season=None):
+    url = f"{FOOTBALL_API_URL}/fixtures"
+    headers = {"x-apisports-key": API_KEY}
+    params = {"date": date_str}
+    if league:
+        params["league"] = league
+        params["season"] = season
 
+    data = await api_budget.get_json(
+        url, headers=headers, params=params, priority=quota.FIXTURES, timeout=15, parse=parse_fixtures
+    )
+    return data.get("response", [])
 
-def save_state(state):
-    if not GIST_ID or not GH_TOKEN:
-        return
 
-    url = f"https://api.github.com/gists/{GIST_ID}"
-    headers = {"Authorization": f"token {GH_TOKEN}"}
-    payload = {
-        "files": {
-            "match_state.json": {
-                "content": json.dumps(state, indent=2)
-            }
-        }
-    }
-    requests.patch(url, headers=headers, json=payload, timeout=10)
+async def fetch_fixtures_by_league(date_str, league, season):
+    return await fetch_fixtures_by_date(date_str, league, season)
 
 
-# =====================
-# FOOTBALL API
-# =====================
-def fetch_fixtures_window():
+async def fetch_fixtures_window():
     fixtures = []
     seen = set()
-
-    for offset in (-1, 0, 1):
-        date_str = (datetime.now(timezone.utc) + timedelta(days=offset)).strftime("%Y-%m-%d")
-        url = "https://v3.football.api-sports.io/fixtures"
-        headers = {"x-apisports-key": API_KEY}
-        params = {"date": date_str}
-
-        r = requests.get(url, headers=headers, params=params, timeout=15)
-        r.raise_for_status()
-
-        for m in r.json().get("response", []):
+    cache = FixtureCache()
+
+    async def fixtures_on(date_str):
+        try:
+            return await cache.get(date_str, MAJOR_LEAGUE_IDS, fetch_fixtures_by_date, fetch_fixtures_by_league)
+        except quota.QuotaExhausted as e:
+            stale = cache.stale(date_str, MAJOR_LEAGUE_IDS)
+            print(f"⚠️ {e}; using {len(stale)} cached fixtures for {date_str}")
+            return stale
+
+    now = clock.now()
+    dates = [(now + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in (-1, 0, 1)]
+    responses = await asyncio.gather(*(fixtures_on(d) for d in dates))
+    cache.save()
+
+    for response in responses:
+        for m in response:
             if m["league"]["id"] in MAJOR_LEAGUE_IDS:
                 fid = m["fixture"]["id"]
                 if fid not in seen:
@@ -165,94 +154,134 @@ def fetch_fixtures_window():
     return fixtures
     
     
-def fetch_match_odds(fixture_id):
-    url = "https://v3.football.api-sports.io/odds"
+async def fetch_match_odds(fixture_id):
+    url = f"{FOOTBALL_API_URL}/odds"
     headers = {"x-apisports-key": API_KEY}
     params = {
         "fixture": fixture_id,
         "bet": 1  # 1X2 market
     }
 
-    r = requests.get(url, headers=headers, params=params, timeout=15)
-    r.raise_for_status()
+    hit, summary = odds.lookup(fixture_id)
+    if hit:
+        return summary
 
-    response = r.json().get("response", [])
-    if not response:
-        return None
+    data = await api_budget.get_json(url, headers=headers, params=params, priority=quota.ODDS, timeout=15)
 
-    bookmakers = response[0].get("bookmakers", [])
-    if not bookmakers:
-        return None
+    # Consensus over every bookmaker instead of whichever is listed first
+    summary = odds.summarize(data.get("response", []))
+    odds.remember(fixture_id, summary)
+    return summary
 
-    bets = bookmakers[0].get("bets", [])
-    values = bets[0].get("values", [])
 
-    odds = {}
-    for v in values:
-        odds[v["value"].lower()] = float(v["odd"])
+async def fetch_fixtures(match_ids):
+    # Current fixture data for the tracked ids only, keyed by fixture id
+    return await match_stats.fetch_by_ids(api_budget, API_KEY, match_ids)
 
-    return {
-        "home": odds.get("home"),
-        "draw": odds.get("draw"),
-        "away": odds.get("away")
-    }
 
+# Up to this many fixtures are asked for one by one; beyond it a single
+# unfiltered /odds/live call (every in-play fixture) is cheaper on quota.
+LIVE_ODDS_SINGLE_MAX = 3
 
-# =====================
-# PREDICTION
-# =====================
-def predict_base_outcome(match):
-    stats = match.get("statistics", [])
 
-    home_shots = away_shots = 0
+async def fetch_live_odds(fixture_ids):
+    # In-play 1X2 line for the given fixtures, keyed by fixture id
+    url = f"{FOOTBALL_API_URL}/odds/live"
+    headers = {"x-apisports-key": API_KEY}
+    wanted = set(str(x) for x in fixture_ids)
+
+    if len(wanted) <= LIVE_ODDS_SINGLE_MAX:
+        responses = await asyncio.gather(*(
+            api_budget.get_json(url, headers=headers, params={"fixture": fid}, priority=quota.ODDS, timeout=15)
+            for fid in sorted(wanted)
+        ))
+    else:
+        responses = [await api_budget.get_json(url, headers=headers, priority=quota.ODDS, timeout=15)]
 
-    # ✅ ADD THIS BLOCK (PRE-MATCH FIX)
-    if not stats:
-        odds = match.get("odds")
-    
-        # If odds available, trust market
-        if odds and odds.get("home") and odds.get("away"):
-            if odds["home"] < odds["away"]:
-                return "home"
-            elif odds["away"] < odds["home"]:
-                return "away"
-    
-        # Home advantage fallback
-        r = random.random()
-        if r < 0.50:
-            return "home"
-        elif r < 0.72:
-            return "draw"
-        else:
-            return "away"
-
-    for team in stats:
-        if team["team"]["id"] == match["teams"]["home"]["id"]:
-            home_shots = next(
-                (s["value"] for s in team["statistics"] if s["type"] == "Shots on Goal"),
-                0
-            ) or 0
-        else:
-            away_shots = next(
-                (s["value"] for s in team["statistics"] if s["type"] == "Shots on Goal"),
-                0
-            ) or 0
+    lines = {}
+    for data in responses:
+        for item in data.get("response", []):
+            fid = str(item["fixture"]["id"])
+            line = odds.live_line(item) if fid in wanted else None
+            if line:
+                lines[fid] = line
+    return lines
+
+
+async def fetch_fixture_statistics(fixture_id):
+    return await match_stats.fetch_statistics(api_budget, API_KEY, fixture_id)
+
+
+async def ingest_statistics(fixtures):
+    # In-play fixtures get a compact "stats" table; /fixtures?ids= batches
+    # carry statistics, the per-fixture endpoint only fills the gaps
+    import aiohttp
+
+    try:
+        await match_stats.ingest(fixtures, fetch_fixtures, fetch_fixture_statistics)
+    except (asyncio.TimeoutError, aiohttp.ClientError, quota.QuotaExhausted) as e:
+        print(f"⚠️ Statistics fetch failed: {e!r}")
+
+
+def empty_odds():
+    return {"home": None, "draw": None, "away": None, "prob": None, "overround": None, "books": 0}
+
+
+# api-sports counts every odds call against the per-minute quota,
+# so never have more than a few of them in flight.
+ODDS_CONCURRENCY = int(os.environ.get("ODDS_CONCURRENCY", "3"))
+ODDS_TIMEOUT_SECONDS = 15
+
+_odds_semaphore = asyncio.Semaphore(ODDS_CONCURRENCY)
+_odds_in_flight = {}
+
+
+async def _fetch_match_odds_limited(fixture_id):
+    import aiohttp
+
+    async with _odds_semaphore:
+        try:
+            summary = await asyncio.wait_for(fetch_match_odds(fixture_id), ODDS_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, aiohttp.ClientError, quota.QuotaExhausted) as e:
+            print(f"⚠️ Odds fetch failed for {fixture_id}: {e!r}")
+            return empty_odds()
+
+    return summary or empty_odds()
 
-    if abs(home_shots - away_shots) <= 1:
-        return "draw"
-    return "home" if home_shots > away_shots else "away"
 
+async def fetch_match_odds_shared(fixture_id):
+    # Callers asking for the same fixture while a request is in flight share it
+    task = _odds_in_flight.get(fixture_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_match_odds_limited(fixture_id))
+        _odds_in_flight[fixture_id] = task
+        task.add_done_callback(lambda _: _odds_in_flight.pop(fixture_id, None))
 
+    summary = await asyncio.shield(task)
+    return dict(summary)
+
+
+async def fetch_odds_for(fixture_ids):
+    lines = await asyncio.gather(*(fetch_match_odds_shared(fid) for fid in fixture_ids))
+    odds.save()
+    return lines
+
+
+# =====================
+# MARKET ODDS
+# =====================
+@metrics.timed("build_message")
 def format_odds(match):
-    odds = match.get("odds", {})
-    if not odds:
+    line = match.get("odds", {})
+    if not line:
         return ""
 
-    h = odds.get("home")
-    d = odds.get("draw")
-    a = odds.get("away")
+    h = line.get("home")
+    d = line.get("draw")
+    a = line.get("away")
+    books = f" ({line['books']} bookmakers)" if line.get("books", 0) > 1 else ""
 
-    return f"""📊 MARKET ODDS
+    return f"""📊 MARKET ODDS{books}
 🏠 {match['home']} Win — {h if h else '-'}
 🤝 Draw — {d if d else '-'}
 🚪 {match['away']} — {a if a else '-'}
@@ -260,6 +289,25 @@ def format_odds(match):
 # =====================
 # MESSAGE BUILDERS (WITH MATCH COUNTER)
 # =====================
+def format_odds_move(match):
+    # "📈 Odds Move: 1 1.85 → 1.20 | X 3.40 → 4.10" once in-play odds exist
+    move = odds.movement(match)
+    if not move:
+        return ""
+
+    opening = match.get("odds") or {}
+    latest = odds.current(match)
+    parts = [
+        f"{label} {opening[k]} → {latest[k]}"
+        for k, label in (("home", "1"), ("draw", "X"), ("away", "2"))
+        if move[k]
+    ]
+    if not parts:
+        return ""
+    return f"📈 Odds Move ({latest['minute']}'): " + " | ".join(parts) + "\n"
+
+
+@metrics.timed("build_message")
 def build_prediction(match, goals=None):
     style = random.choice(STYLE_LINES)
     closer = random.choice(CLOSERS)
@@ -289,6 +337,19 @@ def build_prediction(match, goals=None):
 """
 
 
+@metrics.timed("build_message")
+def build_be_active(m, fmt):
+    kickoff = parse_kickoff(m).astimezone(fmt["tzinfo"])
+    return f"""🚨 BE ACTIVE
+        
+⚽ {m['home']} vs {m['away']}
+⏰ MATCH TIME – {kickoff.strftime('%I:%M %p')} {fmt['tz']}
+        
+🕶️ Phantom Time
+"""
+
+
+@metrics.timed("build_message")
 def build_header(title, match_no, total, league, home, away):
     return f"""🚨 MATCH {match_no}/{total} — {title}
 
@@ -300,82 +361,85 @@ def build_header(title, match_no, total, league, home, away):
 # =====================
 # TELEGRAM SEND
 # =====================
-async def send_message(text):
-    await client.send_message(channel_id, text)
-    print("✅ Message sent")
+async def send_message(message, holder=None, event=None):
+    # message is text or a callable(fmt) for target-specific rendering;
+    # per-target delivery status is kept under holder["delivery"][event]
+    if live_board.absorbs(event) and holder is not None:
+        # Goes into the match's (or the day's) board at the end of the tick
+        live_board.note(store, holder, message)
+        delivery = dict(holder.get("delivery", {}))
+        delivery[event] = "board"
+        store.set(holder, "delivery", delivery)
+        return
+
+    status = await fanout.send(message)
+
+    if event:
+        if holder is None:
+            holder = store.state
+        delivery = dict(holder.get("delivery", {}))
+        delivery[event] = status
+        store.set(holder, "delivery", delivery)
+
+    ok = sum(1 for v in status.values() if v == "ok")
+    print(f"✅ Message sent ({ok}/{len(status)} targets)")
 
 
 # =====================
 # MORNING JOB
 # =====================
+@metrics.timed("job_morning")
 async def job_morning():
 
-    state = load_state()
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    state = await store.get()
+    today = clock.now().strftime("%Y-%m-%d")
 
     if state.get("date") == today and state.get("matches"):
         print("Morning job already executed today")
         return
 
-    fixtures = fetch_fixtures_window()
+    fixtures = await fetch_fixtures_window()
     if not fixtures:
         print("No matches found in ±1 day window")
         return
 
-    # Sort by importance (highest first)
-    fixtures.sort(key=match_importance_score, reverse=True)
-
-    # Dynamic selection
-    selected = []
-
-    for m in fixtures:
-        selected.append(m)
-        if len(selected) >= 5:
-            break
-
-    # Minimum guarantee (at least 2 big matches)
-    if len(selected) < 2:
-        selected = fixtures[:2]
-
-    fixtures = selected
+    # Most important matches first, without sorting the whole list
+    fixtures = RANKING.top(fixtures, MAX_MATCHES_PER_DAY)
 
 
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    today = clock.now().strftime("%Y-%m-%d")
     state = {"date": today, "matches": []}
 
-    for i, m in enumerate(fixtures, 1):
+    all_odds, _ = await asyncio.gather(
+        fetch_odds_for([m["fixture"]["id"] for m in fixtures]),
+        ingest_statistics(fixtures)
+    )
 
-        odds = fetch_match_odds(m["fixture"]["id"]) or {
-            "home": None,
-            "draw": None,
-            "away": None
-        }
-    
-        state["matches"].append({
-            "match_id": str(m["fixture"]["id"]),
-            "match_number": i,
-            "home": m["teams"]["home"]["name"],
-            "away": m["teams"]["away"]["name"],
-            "league": m["league"]["name"],
-            "kickoff": m["fixture"]["date"],
-            "odds": odds,  # ✅ stored
-            "base_outcome": predict_base_outcome(m),
-            "ht_draw_advised": False,
-            "alert": False,
-            "pre": False,
-            "ht": False,
-            "day_summary_sent": False,
-            "ft": False
-        })
+    for i, (m, line) in enumerate(zip(fixtures, all_odds), 1):
+        m["odds"] = line  # only fixtures already in play have shots data; the rest fall back to the market
+
+        state["matches"].append(lifecycle.new_match(
+            match_id=str(m["fixture"]["id"]),
+            match_number=i,
+            home=m["teams"]["home"]["name"],
+            away=m["teams"]["away"]["name"],
+            league=m["league"]["name"],
+            kickoff=m["fixture"]["date"],
+            odds=line,  # ✅ stored
+            base_outcome=predict_base_outcome(m),
+            ht_draw_advised=False
+        ))
     
-    save_state(state)
+    store.replace(state)
+    await store.commit()
 
     msg = f"🌅 GOOD MORNING PHANTOMS! Aaj Jo Matches Hum Karenge --\n\n"
     for m in state["matches"]:
         msg += f"⚽ Match {m['match_number']}: {m['home']} vs {m['away']}\n"
     msg += "\n🕶️ Phantom Time"
 
-    await send_message(msg)
+    await send_message(msg, state, "morning")
+    await store.commit()
     
     
 
@@ -384,108 +448,218 @@ async def job_morning():
 # =====================
 # CHECK JOB
 # =====================
+@metrics.timed("job_check")
 async def job_check():
-    state = load_state()
+    state = await store.get()
     if not state["matches"]:
         return
 
-    now = datetime.now(timezone.utc)
+    # Every flag change made during the tick goes out in one write, even if
+    # a send fails halfway through.
+    try:
+        await check_matches(state)
+    finally:
+        await store.commit()
+        api_budget.save()
+
+
+def check_due(now_ts):
+    # Decided from the local state file alone, before Telethon is imported
+    # or any connection is opened. Anything it cannot vouch for (no local
+    # state, an unfinished Gist mirror, state from before phases) runs the
+    # full tick, as does a live board edit still waiting to go out; a Gist
+    # updated elsewhere is picked up by the next one.
+    state = read_json(store.path)
+    if state is None or (read_json(store.meta_path) or {}).get("remote_dirty"):
+        return True
+
+    matches = state.get("matches", [])
+    if any("phase" not in m or lifecycle.is_due(m, now_ts) for m in matches) or live_board.pending(state):
+        return True
+    return bool(matches) and not state.get("day_summary_sent") and all(
+        m["phase"] == lifecycle.FINISHED for m in matches
+    )
+
+
+async def check_matches(state):
+    now = clock.now()
+    now_ts = now.timestamp()
     total = len(state["matches"])
-    live = fetch_fixtures(True)
 
     for m in state["matches"]:
-        kickoff = datetime.fromisoformat(m["kickoff"].replace("Z", "+00:00"))
-        # ⏰ BE ACTIVE ALERT (1–1.5 HOURS BEFORE)
-        if not m.get("alert", False):
-            minutes_to_kickoff = (kickoff - now).total_seconds() / 60
-        
-            if 60 <= minutes_to_kickoff <= 90:
-                
-                IST = timezone(timedelta(hours=5, minutes=30))
-        
-                msg = f"""🚨 BE ACTIVE
-        
-⚽ {m['home']} vs {m['away']}
-⏰ MATCH TIME – {kickoff.astimezone(IST).strftime('%I:%M %p')} IST
-        
-🕶️ Phantom Time
-"""
-                await send_message(msg)
-                m["alert"] = True
+        lifecycle.migrate(store, m, now_ts)
 
-        # PRE MATCH
-        if not m["pre"] and 0 <= (kickoff - now).total_seconds() / 60 <= 35:
-            header = build_header(
-                "PRE-MATCH ANALYSIS",
-                m["match_number"], total,
-                m["league"], m["home"], m["away"]
-            )
-            await send_message(header + build_prediction(m))
-            m["pre"] = True
+    # Matches whose wake-up time has not come yet cost nothing this tick
+    due = [m for m in state["matches"] if lifecycle.is_due(m, now_ts)]
 
-        # LIVE
-        live_match = next((x for x in live if str(x["fixture"]["id"]) == m["match_id"]), None)
-        
-        if not live_match:
-            if not m["ft"] and now > kickoff + timedelta(hours=2, minutes=30):
-                m["ft"] = True
-                m["success"] = None  # unknown / skipped
-                save_state(state)
-            continue
+    tracked = [m["match_id"] for m in due if needs_live_data(m, now_ts)]
+    try:
+        live = await fetch_fixtures(tracked) if tracked else {}
+    except quota.QuotaExhausted as e:
+        print(f"⚠️ {e}")
+        live = {}
 
-        goals = (
-            live_match["goals"]["home"] or 0,
-            live_match["goals"]["away"] or 0
-        )
+    await update_live_odds(due, live, now_ts)
+
+    for m in due:
+        await advance_match(m, live.get(m["match_id"]), now, total)
+
+    await live_board.flush(store, state, fanout.publish, lambda m: build_header(
+        "LIVE MATCH", m["match_number"], total, m["league"], m["home"], m["away"]
+    ))
+    await send_day_summary(state)
+
+
+def needs_live_data(m, now_ts):
+    return m["phase"] in (lifecycle.PRE_SENT, lifecycle.LIVE, lifecycle.HT_DONE) and \
+        now_ts >= lifecycle.kickoff_ts(m)
+
+
+async def update_live_odds(matches, live, now_ts):
+    # In-play odds for the matches being polled anyway, at most once per
+    # odds.LIVE_ODDS_POLL_SECONDS each, plus once at half-time for the draw hedge
+    wanted = {}
+    for m in matches:
+        live_match = live.get(m["match_id"])
+        if not live_match or not needs_live_data(m, now_ts):
+            continue
         status = live_match["fixture"]["status"]["short"]
+        if status not in lifecycle.IN_PLAY_STATUSES:
+            continue
+        at_half_time = status == "HT" and m["phase"] != lifecycle.HT_DONE
+        if at_half_time or now_ts - (m.get("odds_live_at") or 0) >= odds.LIVE_ODDS_POLL_SECONDS:
+            wanted[m["match_id"]] = (m, live_match["fixture"]["status"].get("elapsed") or 0)
 
-        elapsed = live_match["fixture"]["status"].get("elapsed", 0)
+    if not wanted:
+        return
 
-        if not m["ht"] and (
-            status == "HT" or
-            (status == "2H" and elapsed <= 55)
-        ):
-            home_goals, away_goals = goals
-            base = m["base_outcome"]
-
-            # Determine goal difference relative to our prediction
-            if base == "home":
-                diff = home_goals - away_goals
-            elif base == "away":
-                diff = away_goals - home_goals
-            else:  # base == "draw"
-                if home_goals == away_goals:
-                    diff = 0
-                elif abs(home_goals - away_goals) == 1:
-                    diff = -1
-                else:
-                    diff = -2
-  # draw case
-
-            # ❌ Skip HT if losing by 2 or more
-            if diff <= -2:
-                m["ht"] = True
-                continue
+    import aiohttp
+
+    try:
+        lines = await fetch_live_odds(wanted)
+    except (asyncio.TimeoutError, aiohttp.ClientError, quota.QuotaExhausted) as e:
+        print(f"⚠️ Live odds fetch failed: {e!r}")
+        return
+
+    for fid, (m, minute) in wanted.items():
+        store.set(m, "odds_live_at", int(now_ts))
+        series = odds.record_live(m, minute, lines[fid]) if fid in lines else None
+        if series:
+            store.set(m, "odds_live", series)
 
+
+async def advance_match(m, live_match, now, total):
+    now_ts = now.timestamp()
+    kickoff = parse_kickoff(m)
+    minutes_to_kickoff = (kickoff - now).total_seconds() / 60
+
+    status = elapsed = None
+    if live_match:
+        status = live_match["fixture"]["status"]["short"]
+        elapsed = live_match["fixture"]["status"].get("elapsed") or 0
+        live_board.track(store, m, live_match)
+
+    # ⏰ BE ACTIVE ALERT (1–1.5 HOURS BEFORE)
+    if m["phase"] == lifecycle.UPCOMING:
+        lo, hi = lifecycle.ALERT_WINDOW
+        if lo <= minutes_to_kickoff <= hi:
+            await send_message(lambda fmt, m=m: build_be_active(m, fmt), m, "alert")
+            lifecycle.transition(store, m, lifecycle.ALERTED, now_ts)
+        elif minutes_to_kickoff < lo:
+            lifecycle.transition(store, m, lifecycle.ALERTED, now_ts, "alert window missed")
+
+    # PRE MATCH
+    if m["phase"] == lifecycle.ALERTED:
+        lo, hi = lifecycle.PRE_WINDOW
+        if lo <= minutes_to_kickoff <= hi:
             header = build_header(
-                "HALF-TIME UPDATE",
+                "PRE-MATCH ANALYSIS",
                 m["match_number"], total,
                 m["league"], m["home"], m["away"]
             )
+            await send_message(header + build_prediction(m), m, "pre")
+            lifecycle.transition(store, m, lifecycle.PRE_SENT, now_ts)
+        elif minutes_to_kickoff < lo:
+            lifecycle.transition(store, m, lifecycle.PRE_SENT, now_ts, "pre window missed")
+
+    # LIVE
+    if m["phase"] == lifecycle.PRE_SENT and status in (
+        lifecycle.IN_PLAY_STATUSES | lifecycle.FINISHED_STATUSES
+    ):
+        lifecycle.transition(store, m, lifecycle.LIVE, now_ts, status)
+
+    if m["phase"] in (lifecycle.LIVE, lifecycle.HT_DONE):
+        goals = (
+            live_match["goals"]["home"] or 0,
+            live_match["goals"]["away"] or 0
+        ) if live_match else None
+
+        if m["phase"] == lifecycle.LIVE and live_match:
+            if status == "HT" or (status == "2H" and elapsed <= lifecycle.HT_LATEST_ELAPSED):
+                await send_half_time(m, goals, total)
+                lifecycle.transition(store, m, lifecycle.HT_DONE, now_ts)
+            elif status in ("2H", "ET", "BT", "P") or status in lifecycle.FINISHED_STATUSES:
+                lifecycle.transition(store, m, lifecycle.HT_DONE, now_ts, "ht window missed")
+
+        # Checked in the same tick as HT so a late first sighting still settles
+        if m["phase"] == lifecycle.HT_DONE and live_match and (
+            status in lifecycle.FINISHED_STATUSES or
+            (status == "2H" and elapsed >= lifecycle.FT_ELAPSED)
+        ):
+            await send_full_time(m, goals, total)
+            lifecycle.transition(store, m, lifecycle.FINISHED, now_ts, status)
+
+    if m["phase"] != lifecycle.FINISHED:
+        if status in lifecycle.ABANDONED_STATUSES:
+            store.set(m, "success", None)  # unknown / skipped
+            lifecycle.transition(store, m, lifecycle.FINISHED, now_ts, status)
+        elif now > kickoff + lifecycle.HARD_STOP or (
+            now > kickoff + lifecycle.LIVE_WINDOW and status not in lifecycle.IN_PLAY_STATUSES
+        ):
+            store.set(m, "success", None)  # unknown / skipped
+            lifecycle.transition(store, m, lifecycle.FINISHED, now_ts, "timeout")
+
+    store.set(m, "wake_at", lifecycle.next_wake(m, now_ts, status, elapsed, follow=live_board.enabled()))
+
+
+async def send_half_time(m, goals, total):
+    home_goals, away_goals = goals
+    base = m["base_outcome"]
+
+    # Determine goal difference relative to our prediction
+    if base == "home":
+        diff = home_goals - away_goals
+    elif base == "away":
+        diff = away_goals - home_goals
+    else:  # base == "draw"
+        if home_goals == away_goals:
+            diff = 0
+        elif abs(home_goals - away_goals) == 1:
+            diff = -1
+        else:
+            diff = -2
+
+    # ❌ Skip HT if losing by 2 or more
+    if diff <= -2:
+        return
+
+    header = build_header(
+        "HALF-TIME UPDATE",
+        m["match_number"], total,
+        m["league"], m["home"], m["away"]
+    )
 
-            # ✅ If winning → normal prediction
-            if diff > 0:
-                await send_message(header + build_prediction(m, goals))
+    # ✅ If winning → normal prediction
+    if diff > 0:
+        await send_message(header + build_prediction(m, goals), m, "ht")
 
-            # 🔁 If draw (1–1 etc.)
-            elif diff == 0:
-                draw_odds = (m.get("odds") or {}).get("draw")
+    # 🔁 If draw (1–1 etc.)
+    elif diff == 0:
+        draw_odds = odds.current(m).get("draw")
 
-                # Only advise draw if odds are good
-                if draw_odds and draw_odds >= 2.20 and not m.get("ht_draw_advised"):
-                    m["ht_draw_advised"] = True
-            
-                    msg = f"""{header}
+        # Only advise draw if odds are good
+        if draw_odds and draw_odds >= 2.20 and not m.get("ht_draw_advised"):
+            msg = f"""{header}
 🧠 Match abhi tak tight chal raha hai
 Zyada domination nahi dikh rahi
 
@@ -494,71 +668,155 @@ Zyada domination nahi dikh rahi
 📌 Hedge Tip:
 Thodi Limit Draw Par Lagao 🤝
 💰 Draw Odds: {draw_odds}
-
+{format_odds_move(m)}
 🕶️ Phantom Time
 """
-                await send_message(msg)
-            # 🔁 Losing by exactly 1
-            elif diff == -1:
-                line = random.choice(HT_LOSING_LINES)
-                msg = f"""{header}
+            await send_message(msg, m, "ht")
+            store.set(m, "ht_draw_advised", True)
+
+    # 🔁 Losing by exactly 1
+    elif diff == -1:
+        line = random.choice(HT_LOSING_LINES)
+        msg = f"""{header}
 🧠 {line}
 
 ⚽ {m['home']} {home_goals} - {away_goals} {m['away']}
-
+{format_odds_move(m)}
 🕶️ Phantom Time
 """
-                await send_message(msg)
+        await send_message(msg, m, "ht")
 
-            m["ht"] = True
 
+async def send_full_time(m, goals, total):
+    final_is_draw = goals[0] == goals[1]
+    success = (
+        (m["base_outcome"] == "draw" and final_is_draw) or
+        (m["base_outcome"] == "home" and goals[0] > goals[1]) or
+        (m["base_outcome"] == "away" and goals[1] > goals[0]) or
+        (final_is_draw and m.get("ht_draw_advised", False))
+    )
 
-        elapsed = live_match["fixture"]["status"].get("elapsed", 0)
+    result = "✅ Tip Pass" if success else "❌ Tip Fail"
 
-        if not m["ft"] and (
-            status in ("FT", "AET", "PEN") or
-            (status == "2H" and elapsed >= 88)
-):
-            final_is_draw = goals[0] == goals[1]
-            success = (
-                (m["base_outcome"] == "draw" and final_is_draw) or
-                (m["base_outcome"] == "home" and goals[0] > goals[1]) or
-                (m["base_outcome"] == "away" and goals[1] > goals[0]) or
-                (final_is_draw and m.get("ht_draw_advised", False))
-            )
+    header = build_header(
+        f"FULL-TIME RESULT — {result}",
+        m["match_number"], total,
+        m["league"], m["home"], m["away"]
+    )
+
+    await send_message(
+        header +
+        f"\n⚽ FINAL SCORE: {goals[0]}-{goals[1]}\n{format_odds_move(m)}\n🕶️ Phantom Time",
+        m, "ft"
+    )
+    store.set(m, "success", success)
+
+
+async def send_day_summary(state):
+    if state.get("day_summary_sent"):
+        return
+    if not all(x["phase"] == lifecycle.FINISHED for x in state["matches"]):
+        return
+
+    passed = sum(1 for x in state["matches"] if x.get("success"))
+    failed = len(state["matches"]) - passed
+
+    summary_msg = f"""📊 DAY SUMMARY
 
-            result = "✅ Tip Pass" if success else "❌ Tip Fail"
-            m["success"] = success
-        
-            header = build_header(
-                f"FULL-TIME RESULT — {result}",
-                m["match_number"], total,
-                m["league"], m["home"], m["away"]
-            )
-        
-            await send_message(
-                header +
-                f"\n⚽ FINAL SCORE: {goals[0]}-{goals[1]}\n\n🕶️ Phantom Time"
-            )
-        
-            m["ft"] = True
-            save_state(state)   # ✅ CRITICAL FIX
-        
-            if all(x.get("ft") for x in state["matches"]) and not state.get("day_summary_sent"):
-                passed = sum(1 for x in state["matches"] if x.get("success"))
-                failed = len(state["matches"]) - passed
-        
-                summary_msg = f"""📊 DAY SUMMARY
-        
 ✅ PASSED: {passed}
 ❌ FAILED: {failed}
 
 🕶️ Phantom Time
 """
-                await send_message(summary_msg)
-                state["day_summary_sent"] = True
-                save_state(state)
-                    
+    await send_message(summary_msg, state, "day_summary")
+    store.set(state, "day_summary_sent", True)
+
+
+# =====================
+# LIVE TIPS
+# =====================
+@metrics.timed("job_live_tips")
+async def job_live_tips():
+    # postmatch.py's worker on this process's Telegram client, HTTP pool
+    # and quota budget
+    import postmatch
+
+    try:
+        await postmatch.run_cycle(fanout, api_budget, api_key=API_KEY)
+    finally:
+        api_budget.save()
+
+
+# =====================
+# DAEMON
+# =====================
+MORNING_HOUR_UTC = int(os.environ.get("MORNING_HOUR_UTC", "6"))
+LIVE_POLL_SECONDS = int(os.environ.get("LIVE_POLL_SECONDS", "60"))
+IDLE_POLL_SECONDS = int(os.environ.get("IDLE_POLL_SECONDS", "3600"))
+ERROR_RETRY_SECONDS = 120
+# CHECK_GATE=0 makes every `check` run do the full tick
+CHECK_GATE = os.environ.get("CHECK_GATE", "1") != "0"
+STATE_DEBOUNCE_SECONDS = int(os.environ.get("STATE_DEBOUNCE_SECONDS", "10"))
+# postmatch.py's live tips run inside the daemon when set (0 = off)
+LIVE_TIPS_SECONDS = int(os.environ.get("LIVE_TIPS_SECONDS", "0"))
+
+
+def next_morning_run(now):
+    run = now.replace(hour=MORNING_HOUR_UTC, minute=0, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(days=1)
+    return run
+
+
+async def run_daemon():
+    # Sleeps until the next timed event (daily morning run, a match's
+    # lifecycle wake-up, or the idle heartbeat) instead of polling.
+    store.debounce_seconds = STATE_DEBOUNCE_SECONDS
+    await store.load()
+
+    now = clock.now()
+    first_morning = next_morning_run(now)
+    if store.state.get("date") != now.strftime("%Y-%m-%d") and now.hour >= MORNING_HOUR_UTC:
+        first_morning = now
+
+    events = Scheduler()
+    events.schedule(MORNING, None, first_morning.timestamp())
+    events.schedule(HEARTBEAT, None, now.timestamp())
+    if LIVE_TIPS_SECONDS:
+        events.schedule(LIVE_TIPS, None, now.timestamp())
+
+    while True:
+        delay = max(0.0, events.next_time() - clock.now().timestamp())
+        if delay:
+            print(f"💤 Next event in {int(delay)}s")
+            await clock.sleep(delay)
+
+        now_ts = clock.now().timestamp()
+        kinds = {kind for kind, _ in events.pop_due(now_ts)}
+
+        try:
+            if MORNING in kinds:
+                await job_morning()
+                events.schedule(MORNING, None, next_morning_run(clock.now()).timestamp())
+            await job_check()
+            if LIVE_TIPS in kinds:
+                await job_live_tips()
+                events.schedule(LIVE_TIPS, None, now_ts + LIVE_TIPS_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Daemon tick failed: {e!r}")
+            if MORNING in kinds:
+                events.schedule(MORNING, None, now_ts + ERROR_RETRY_SECONDS)
+            events.schedule(HEARTBEAT, None, now_ts + ERROR_RETRY_SECONDS)
+            if LIVE_TIPS in kinds:
+                events.schedule(LIVE_TIPS, None, now_ts + LIVE_TIPS_SECONDS)
+
+        if not events.is_scheduled(HEARTBEAT, None):
+            events.schedule(HEARTBEAT, None, now_ts + IDLE_POLL_SECONDS)
+
+        state = await store.get()
+        events.sync_matches(state.get("matches", []), clock.now().timestamp(), LIVE_POLL_SECONDS)
+        metrics.flush()
+
 
 # =====================
 # MAIN
@@ -569,22 +827,50 @@ async def main():
     if len(sys.argv) < 2:
         return
 
-    global client
+    if sys.argv[1] == "check" and CHECK_GATE and not check_due(clock.now().timestamp()):
+        print("💤 Nothing due")
+        metrics.inc("check_skipped")
+        metrics.flush()
+        return
+
+    from telethon import TelegramClient
+    from telethon.sessions import StringSession
+    from send_queue import SendQueue
+
+    global client, sender, fanout
+    if TELEGRAM_BOT_SESSION_STRING:
+        session = StringSession(TELEGRAM_BOT_SESSION_STRING)
+    else:
+        session = TELEGRAM_BOT_SESSION
+
     client = TelegramClient(
-        session=None,
+        session=session,
         api_id=api_id,
         api_hash=api_hash
     )
 
+    # No-op sign-in when the session is already authorized
     await client.start(bot_token=TELEGRAM_BOT_TOKEN)
+    sender = SendQueue(client)
+    fanout = FanOut(sender, load_targets(channel_id))
+    await sender.warm_peers(t["chat_id"] for t in fanout.targets)
 
     try:
         if sys.argv[1] == "morning":
             await job_morning()
         elif sys.argv[1] == "check":
             await job_check()
+        elif sys.argv[1] == "live":
+            await job_live_tips()
+        elif sys.argv[1] == "daemon":
+            await run_daemon()
     finally:
+        await sender.close()
+        await store.close()
+        api_budget.save()
+        await http_client.close()
         await client.disconnect()
+        metrics.flush()
 
 
 if __name__ == "__main__":
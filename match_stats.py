@@ -0,0 +1,176 @@
+import asyncio
+import os
+
+import lifecycle
+import quota
+from http_client import FOOTBALL_API_URL
+
+# =====================
+# STATISTICS TABLE
+# =====================
+# api-sports returns statistics as, per team, a list of {"type", "value"}
+# pairs. They are compacted once into two fixed-order lists (home, away)
+# so a lookup like "Shots on Goal" is an index instead of a scan.
+STAT_TYPES = (
+    "Shots on Goal", "Shots off Goal", "Total Shots", "Blocked Shots",
+    "Shots insidebox", "Shots outsidebox", "Fouls", "Corner Kicks",
+    "Offsides", "Ball Possession", "Yellow Cards", "Red Cards",
+    "Goalkeeper Saves", "Total passes", "Passes accurate", "Passes %",
+    "expected_goals",
+)
+STAT_INDEX = {name: i for i, name in enumerate(STAT_TYPES)}
+SHOTS_ON_GOAL = STAT_INDEX["Shots on Goal"]
+RED_CARDS = STAT_INDEX["Red Cards"]
+
+# Statistics only exist once a fixture has kicked off, and a finished
+# fixture's final numbers would tell a tip how the match ended
+NOT_STARTED_STATUSES = {"TBD", "NS", "PST", "CANC"}
+SKIPPED_STATUSES = NOT_STARTED_STATUSES | lifecycle.FINISHED_STATUSES
+
+STATS_CONCURRENCY = int(os.environ.get("STATS_CONCURRENCY", "4"))
+
+# api-sports accepts at most 20 ids per /fixtures?ids= request
+FIXTURE_IDS_PER_REQUEST = 20
+
+
+def parse_value(value):
+    # "55%" -> 55, "1.32" -> 1.32, None stays None
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().rstrip("%")
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+
+def compact(statistics, home_id):
+    # [[home values], [away values]] in STAT_TYPES order, None where missing
+    table = [[None] * len(STAT_TYPES), [None] * len(STAT_TYPES)]
+    for team in statistics or []:
+        row = table[0] if team["team"]["id"] == home_id else table[1]
+        for s in team.get("statistics", []):
+            i = STAT_INDEX.get(s.get("type"))
+            if i is not None:
+                row[i] = parse_value(s.get("value"))
+    return table
+
+
+def pair(table, index):
+    # (home, away) for one stat, missing values as 0
+    return table[0][index] or 0, table[1][index] or 0
+
+
+def table_for(match):
+    # The compact table of a fixture, built from raw statistics if needed
+    table = match.get("stats")
+    if table is None and match.get("statistics"):
+        table = compact(match["statistics"], match["teams"]["home"]["id"])
+    return table
+
+
+def red_cards(match):
+    # (home, away) red cards from the statistics table, falling back to a
+    # "cards" block ({"red": {"home", "away"}})
+    table = table_for(match)
+    if table is not None:
+        return pair(table, RED_CARDS)
+    reds = match.get("cards", {}).get("red", {})
+    return reds.get("home", 0) or 0, reds.get("away", 0) or 0
+
+
+# =====================
+# FETCHING
+# =====================
+async def fetch_by_ids(api_budget, api_key, fixture_ids):
+    # Current fixture data (statistics included) keyed by fixture id, in
+    # batches of FIXTURE_IDS_PER_REQUEST
+    ids = list(dict.fromkeys(str(x) for x in fixture_ids))
+    if not ids:
+        return {}
+
+    url = f"{FOOTBALL_API_URL}/fixtures"
+    headers = {"x-apisports-key": api_key}
+    chunks = [ids[i:i + FIXTURE_IDS_PER_REQUEST] for i in range(0, len(ids), FIXTURE_IDS_PER_REQUEST)]
+    responses = await asyncio.gather(*(
+        api_budget.get_json(url, headers=headers, params={"ids": "-".join(c)}, priority=quota.LIVE, timeout=15)
+        for c in chunks
+    ))
+    return {str(m["fixture"]["id"]): m for data in responses for m in data.get("response", [])}
+
+
+async def fetch_statistics(api_budget, api_key, fixture_id):
+    url = f"{FOOTBALL_API_URL}/fixtures/statistics"
+    headers = {"x-apisports-key": api_key}
+    data = await api_budget.get_json(
+        url, headers=headers, params={"fixture": fixture_id}, priority=quota.LIVE, timeout=15
+    )
+    return data.get("response", [])
+
+
+# =====================
+# INGESTION
+# =====================
+_cache = {}  # fixture id -> (elapsed minute, table)
+
+
+def _minute(match):
+    return match["fixture"]["status"].get("elapsed")
+
+
+def _remember(match, statistics):
+    fid = str(match["fixture"]["id"])
+    table = compact(statistics, match["teams"]["home"]["id"])
+    _cache[fid] = (_minute(match), table)
+    match["stats"] = table
+
+
+async def ingest(fixtures, fetch_ids, fetch_one):
+    # Attaches a compact "stats" table to every fixture still in play.
+    #   fetch_ids(ids)  -> {fixture id: fixture}, /fixtures?ids= batches
+    #                      (those responses carry statistics)
+    #   fetch_one(fid)  -> statistics list from /fixtures/statistics, only
+    #                      for fixtures the batch came back without
+    # Results are cached per fixture and match minute.
+    pending = {}
+    for m in fixtures:
+        if m["fixture"]["status"].get("short") in SKIPPED_STATUSES:
+            continue
+        fid = str(m["fixture"]["id"])
+        cached = _cache.get(fid)
+        if cached and cached[0] == _minute(m):
+            m["stats"] = cached[1]
+        elif m.get("statistics"):
+            _remember(m, m["statistics"])
+        else:
+            pending[fid] = m
+
+    if not pending:
+        return fixtures
+
+    batched = await fetch_ids(list(pending))
+    missing = []
+    for fid, m in pending.items():
+        fresh = batched.get(fid)
+        if fresh and fresh.get("statistics"):
+            _remember(m, fresh["statistics"])
+        else:
+            missing.append(fid)
+
+    semaphore = asyncio.Semaphore(STATS_CONCURRENCY)
+
+    async def fetch_limited(fid):
+        async with semaphore:
+            return await fetch_one(fid)
+
+    responses = await asyncio.gather(*(fetch_limited(fid) for fid in missing), return_exceptions=True)
+    for fid, statistics in zip(missing, responses):
+        if isinstance(statistics, Exception):
+            print(f"⚠️ Statistics fetch failed for {fid}: {statistics!r}")
+        elif statistics:
+            _remember(pending[fid], statistics)
+
+    return fixtures
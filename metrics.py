@@ -0,0 +1,172 @@
+import asyncio
+import functools
+import json
+import os
+import time
+from collections import defaultdict
+
+# =====================
+# METRICS CONFIG
+# =====================
+# Off unless METRICS_FILE is set. "prom" rewrites the file with Prometheus
+# text on every flush (node_exporter textfile collector); "jsonl" appends
+# one line per span plus a counter snapshot per flush.
+METRICS_FILE = os.environ.get("METRICS_FILE")
+METRICS_FORMAT = os.environ.get("METRICS_FORMAT") or (
+    "jsonl" if (METRICS_FILE or "").endswith(".jsonl") else "prom"
+)
+PREFIX = "phantom"
+ENABLED = bool(METRICS_FILE)
+
+_counters = defaultdict(float)  # (name, labels) -> value
+_spans = {}                     # (name, labels) -> [count, sum, max]
+_events = []
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# =====================
+# SPANS AND COUNTERS
+# =====================
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("key", "start")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        record(self.key, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+def span(name, **labels):
+    # with metrics.span("http", endpoint="/fixtures"): ...
+    if not ENABLED:
+        return _NOOP
+    return _Span(_key(name, labels))
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    _counters[_key(name, labels)] += value
+
+
+def timed(name):
+    # Decorator for sync and async functions; with metrics off the function
+    # is returned as is, so there is no per-call cost at all
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return wrap
+
+
+def record(key, seconds, error=False):
+    stats = _spans.get(key)
+    if stats is None:
+        stats = _spans[key] = [0, 0.0, 0.0]
+    stats[0] += 1
+    stats[1] += seconds
+    stats[2] = max(stats[2], seconds)
+    if error:
+        _counters[_key("span_errors", {**dict(key[1]), "span": key[0]})] += 1
+
+    if METRICS_FORMAT == "jsonl":
+        name, labels = key
+        _events.append({"ts": round(time.time(), 3), "span": name, "seconds": round(seconds, 6),
+                        **dict(labels), **({"error": True} if error else {})})
+
+
+# =====================
+# OUTPUT
+# =====================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    lines = []
+    typed = set()
+    for (name, labels), value in sorted(_counters.items()):
+        metric = f"{PREFIX}_{name}_total"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_labels(labels)} {value:g}")
+
+    if _spans:
+        lines.append(f"# TYPE {PREFIX}_span_seconds summary")
+        lines.append(f"# TYPE {PREFIX}_span_seconds_max gauge")
+    for (name, labels), (count, total, peak) in sorted(_spans.items()):
+        pairs = (("span", name),) + labels
+        lines.append(f"{PREFIX}_span_seconds_count{_labels(pairs)} {count}")
+        lines.append(f"{PREFIX}_span_seconds_sum{_labels(pairs)} {total:.6f}")
+        lines.append(f"{PREFIX}_span_seconds_max{_labels(pairs)} {peak:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    # Counters and span totals as plain dicts, for the JSONL file and the benchmarks
+    return {
+        "counters": {
+            name + _labels(labels): value for (name, labels), value in sorted(_counters.items())
+        },
+        "spans": {
+            name + _labels(labels): {"count": c, "sum": round(s, 6), "max": round(m, 6)}
+            for (name, labels), (c, s, m) in sorted(_spans.items())
+        },
+    }
+
+
+def flush():
+    if not ENABLED:
+        return
+    # Imported here: state_store itself imports http_client, which is instrumented
+    from state_store import write_atomic
+
+    if METRICS_FORMAT == "jsonl":
+        lines = [json.dumps(e, ensure_ascii=False) for e in _events]
+        lines.append(json.dumps({"ts": round(time.time(), 3), **snapshot()}, ensure_ascii=False))
+        _events.clear()
+        with open(METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    else:
+        write_atomic(METRICS_FILE, render_prometheus())
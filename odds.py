@@ -0,0 +1,178 @@
+import json
+import os
+import statistics
+
+import clock
+from state_store import read_json, write_atomic
+
+# =====================
+# ODDS CONFIG
+# =====================
+MATCH_WINNER_BET_ID = 1
+MATCH_WINNER_NAMES = {"match winner", "1x2", "fulltime result"}
+OUTCOMES = ("home", "draw", "away")
+
+# "median" is robust to one bookmaker's stale line, "best" is what a
+# punter can actually get
+CONSENSUS = os.environ.get("ODDS_CONSENSUS", "median")
+# Summaries outlive the process, so a morning job that is re-run (after a
+# crash, or by the next cron tick) does not pay for the same odds twice
+ODDS_CACHE_FILE = os.environ.get("ODDS_CACHE_FILE", "odds_cache.json")
+CACHE_TTL_SECONDS = 10 * 60
+
+
+# =====================
+# PARSING
+# =====================
+def is_match_winner(bet):
+    return bet.get("id") == MATCH_WINNER_BET_ID or str(bet.get("name", "")).lower() in MATCH_WINNER_NAMES
+
+
+def collect_prices(response):
+    # One pass over every bookmaker in an /odds response:
+    # {"home": [1.85, 1.9, ...], "draw": [...], "away": [...]}
+    prices = {k: [] for k in OUTCOMES}
+    for item in response or []:
+        for bookmaker in item.get("bookmakers", []):
+            for bet in bookmaker.get("bets", []):
+                if not is_match_winner(bet):
+                    continue
+                for v in bet.get("values", []):
+                    key = str(v.get("value", "")).lower()
+                    if key not in prices:
+                        continue
+                    try:
+                        price = float(v["odd"])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if price > 1.0:
+                        prices[key].append(price)
+    return prices
+
+
+# =====================
+# CONSENSUS LINE
+# =====================
+def consensus(prices, method=CONSENSUS):
+    pick = max if method == "best" else statistics.median
+    return {k: round(pick(v), 2) if v else None for k, v in prices.items()}
+
+
+def implied_probabilities(line):
+    # Bookmaker margin (overround) removed by normalizing 1/price
+    if not all(line.get(k) for k in OUTCOMES):
+        return None, None
+    raw = {k: 1 / line[k] for k in OUTCOMES}
+    overround = sum(raw.values())
+    return {k: round(p / overround, 4) for k, p in raw.items()}, round(overround, 4)
+
+
+def summarize(response, method=CONSENSUS):
+    # Odds dict stored on a match: consensus prices under home/draw/away
+    # (what format_odds and the HT hedge read) plus fair probabilities
+    prices = collect_prices(response)
+    books = max(len(v) for v in prices.values())
+    if not books:
+        return None
+
+    line = consensus(prices, method)
+    prob, overround = implied_probabilities(line)
+    return {
+        **line,
+        "prob": prob,
+        "overround": overround,
+        "books": books,
+    }
+
+
+# =====================
+# PER-FIXTURE CACHE
+# =====================
+_cache = None
+
+
+def _entries():
+    global _cache
+    if _cache is None:
+        _cache = (read_json(ODDS_CACHE_FILE) or {}).get("entries", {})
+    return _cache
+
+
+def lookup(fixture_id):
+    # (hit, summary); a fixture without odds is cached as (True, None)
+    entry = _entries().get(str(fixture_id))
+    if entry and entry["expires"] > clock.now().timestamp():
+        return True, entry["summary"]
+    return False, None
+
+
+def remember(fixture_id, summary):
+    _entries()[str(fixture_id)] = {"expires": clock.now().timestamp() + CACHE_TTL_SECONDS, "summary": summary}
+
+
+def save():
+    global _cache
+    now = clock.now().timestamp()
+    _cache = {k: v for k, v in _entries().items() if v["expires"] > now}
+    write_atomic(ODDS_CACHE_FILE, json.dumps({"entries": _cache}))
+
+
+# =====================
+# LIVE LINE
+# =====================
+# In-play markets have their own bet ids; 59 is "Fulltime Result"
+LIVE_MATCH_WINNER_BET_ID = 59
+LIVE_ODDS_POLL_SECONDS = int(os.environ.get("LIVE_ODDS_POLL_SECONDS", "300"))
+LIVE_SERIES_MAX = 40
+
+
+def live_line(item):
+    # One /odds/live response item -> {"home", "draw", "away"} or None
+    # while the market is missing or suspended
+    for bet in item.get("odds", []):
+        if bet.get("id") != LIVE_MATCH_WINNER_BET_ID and \
+                str(bet.get("name", "")).lower() not in MATCH_WINNER_NAMES:
+            continue
+        line = {}
+        for v in bet.get("values", []):
+            key = str(v.get("value", "")).lower()
+            if key not in OUTCOMES or v.get("suspended"):
+                continue
+            try:
+                line[key] = round(float(v["odd"]), 2)
+            except (KeyError, TypeError, ValueError):
+                continue
+        if len(line) == len(OUTCOMES):
+            return line
+    return None
+
+
+def record_live(m, minute, line):
+    # Series of [minute, home, draw, away] points, appended only when the
+    # price moved. Returns the new series, or None when nothing changed.
+    series = m.get("odds_live") or []
+    point = [minute, line["home"], line["draw"], line["away"]]
+    if series and series[-1][1:] == point[1:]:
+        return None
+    return (series + [point])[-LIVE_SERIES_MAX:]
+
+
+def current(m):
+    # Latest live line, falling back to the pre-match consensus
+    series = m.get("odds_live")
+    if series:
+        minute, home, draw, away = series[-1]
+        return {"home": home, "draw": draw, "away": away, "minute": minute}
+    return m.get("odds") or {}
+
+
+def movement(m):
+    # Latest live price minus the pre-match one, per outcome
+    if not m.get("odds_live"):
+        return None
+    latest = current(m)
+    opening = m.get("odds") or {}
+    return {
+        k: round(latest[k] - opening[k], 2) if latest.get(k) and opening.get(k) else None
+        for k in OUTCOMES
+    }
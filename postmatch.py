@@ -1,8 +1,27 @@
 import asyncio
+import contextlib
+import fcntl
+import json
+import os
 import random
-import requests
+
+import aiohttp
 from telethon import TelegramClient
 
+import clock
+import http_client
+import live_board
+import match_stats
+import metrics
+import quota
+from http_client import FOOTBALL_API_URL
+from quota import QuotaManager
+from ranking import Ranking
+from send_queue import SendQueue
+from fanout import FanOut, load_targets
+from predict import predict_outcome
+from state_store import read_json, write_atomic
+
 # =====================
 # TELEGRAM CONFIG
 # =====================
@@ -17,23 +36,95 @@ API_KEY = "eecc122a9892c624ebd9878cc5108b93"
 MAJOR_LEAGUE_IDS = {39, 140, 135, 78, 61, 2, 3}
 
 # =====================
-# MATCH COUNTER
+# CYCLE CONFIG
 # =====================
-MATCH_COUNTER_FILE = "match_counter.txt"
-
-def get_match_counter():
-    try:
-        with open(MATCH_COUNTER_FILE, "r") as f:
-            counter = int(f.read().strip())
-    except (FileNotFoundError, ValueError):
-        counter = 0
+# The most important live fixtures get a tip each cycle; a fixture is not
+# tipped again within the cooldown, whichever process (cron run or daemon)
+# tipped it
+LIVE_TIPS_PER_CYCLE = int(os.environ.get("LIVE_TIPS_PER_CYCLE", "3"))
+LIVE_TIP_COOLDOWN_SECONDS = int(os.environ.get("LIVE_TIP_COOLDOWN_SECONDS", str(45 * 60)))
 
-    counter += 1
+RANKING = Ranking.from_file()
 
-    with open(MATCH_COUNTER_FILE, "w") as f:
-        f.write(str(counter))
+# =====================
+# MATCH COUNTER
+# =====================
+MATCH_COUNTER_FILE = os.environ.get("MATCH_COUNTER_FILE", "match_counter.txt")
+# {"tipped": {fixture id: unix time of its last tip},
+#  "boards": {fixture id: [match number, {chat_id: message id}]}}, guarded
+# by the counter's lock. Boards are only written with LIVE_BOARD on.
+LIVE_TIPS_FILE = os.environ.get("LIVE_TIPS_FILE", "live_tips.json")
+
+
+@contextlib.contextmanager
+def _locked():
+    # Every read-modify-write below runs under this exclusive lock and lands
+    # through an atomic rename, so overlapping runs never see each other's
+    # half-done update and a crash never leaves a truncated file behind.
+    # Not reentrant: flock locks per open file.
+    with open(f"{MATCH_COUNTER_FILE}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def reserve_match_numbers(count=1):
+    # First of `count` consecutive match numbers; overlapping runs never
+    # hand out the same number
+    with _locked():
+        try:
+            with open(MATCH_COUNTER_FILE) as f:
+                counter = int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            counter = 0
+        write_atomic(MATCH_COUNTER_FILE, str(counter + count))
+    return counter + 1
+
+
+def _update_tips(change):
+    # change(record) edits the LIVE_TIPS_FILE record in place
+    with _locked():
+        record = read_json(LIVE_TIPS_FILE) or {}
+        result = change(record)
+        write_atomic(LIVE_TIPS_FILE, json.dumps(record))
+    return result
+
+
+def claim_fixtures(fixtures, limit=LIVE_TIPS_PER_CYCLE):
+    # The `limit` most important fixtures outside the cooldown, recorded as
+    # tipped right away so an overlapping run picks different ones, with
+    # the board of each ([match number, ids], or None). Boards of fixtures
+    # that left the live feed are dropped.
+    def change(record):
+        now = clock.now().timestamp()
+        live = {str(m["fixture"]["id"]) for m in fixtures}
+        tipped = {
+            fid: at for fid, at in record.get("tipped", {}).items()
+            if now - at < LIVE_TIP_COOLDOWN_SECONDS
+        }
+        boards = {fid: b for fid, b in record.get("boards", {}).items() if fid in live}
+        picked = RANKING.top([m for m in fixtures if str(m["fixture"]["id"]) not in tipped], limit)
+        for m in picked:
+            tipped[str(m["fixture"]["id"])] = now
+        record["tipped"] = tipped
+        record["boards"] = boards
+        return picked, [boards.get(str(m["fixture"]["id"])) for m in picked]
+
+    return _update_tips(change)
+
+
+def settle_fixtures(failed, boards):
+    # Tips that were not posted do not hold their fixture in the cooldown;
+    # boards ({fixture id: [match number, ids]}) of the posted ones are kept
+    def change(record):
+        for fid in failed:
+            record.get("tipped", {}).pop(str(fid), None)
+        record.setdefault("boards", {}).update({str(fid): b for fid, b in boards.items()})
+
+    _update_tips(change)
 
-    return counter
 
 # =====================
 # TEXT BLOCKS
@@ -77,53 +168,34 @@ CLOSERS = [
 ]
 
 # =====================
-# SMART PREDICTION LOGIC
-# =====================
-def predict_outcome(ht_home, ht_away, red_home, red_away):
-    if red_home > red_away:
-        return random.choices(["away", "draw"], weights=[70, 30])[0]
-    if red_away > red_home:
-        return random.choices(["home", "draw"], weights=[70, 30])[0]
-
-    if ht_home == 0 and ht_away == 0:
-        return random.choice(["home", "away", "draw"])
-
-    if ht_home == 1 and ht_away == 0:
-        return random.choices(["home", "draw"], weights=[70, 30])[0]
-
-    if ht_home == 0 and ht_away == 1:
-        return random.choices(["away", "draw"], weights=[70, 30])[0]
-
-    if ht_home - ht_away >= 2:
-        return random.choices(["home", "draw"], weights=[85, 15])[0]
-
-    if ht_away - ht_home >= 2:
-        return random.choices(["away", "draw"], weights=[85, 15])[0]
-
-    return random.choice(["home", "away", "draw"])
-
-# =====================
-# MAIN LOGIC
+# FOOTBALL API
 # =====================
-async def main():
-    url = "https://v3.football.api-sports.io/fixtures"
-    headers = {"x-apisports-key": API_KEY}
-    params = {"live": "all"}
-
-    response = requests.get(url, headers=headers, params=params)
-    data = response.json()
-
-    fixtures = [
+async def fetch_live_fixtures(api_budget, api_key=API_KEY):
+    url = f"{FOOTBALL_API_URL}/fixtures"
+    headers = {"x-apisports-key": api_key}
+    data = await api_budget.get_json(url, headers=headers, params={"live": "all"}, priority=quota.LIVE, timeout=15)
+    return [
         m for m in data.get("response", [])
         if m.get("league", {}).get("id") in MAJOR_LEAGUE_IDS
     ]
 
-    if not fixtures:
-        print("No live major matches right now.")
-        return
 
-    match = random.choice(fixtures)
+async def attach_statistics(fixtures, api_budget, api_key=API_KEY):
+    # live=all carries no statistics; red cards come from the stats table
+    try:
+        await match_stats.ingest(
+            fixtures,
+            lambda ids: match_stats.fetch_by_ids(api_budget, api_key, ids),
+            lambda fid: match_stats.fetch_statistics(api_budget, api_key, fid),
+        )
+    except (asyncio.TimeoutError, aiohttp.ClientError, quota.QuotaExhausted) as e:
+        print(f"⚠️ Statistics fetch failed: {e!r}")
 
+
+# =====================
+# MESSAGE
+# =====================
+def build_live_post(match, match_no):
     home = match["teams"]["home"]["name"]
     away = match["teams"]["away"]["name"]
     league = match["league"]["name"]
@@ -135,12 +207,10 @@ async def main():
     goals_away = match["goals"]["away"] or 0
 
     ht = match.get("score", {}).get("halftime", {})
-    ht_home = ht.get("home", 0)
-    ht_away = ht.get("away", 0)
+    ht_home = ht.get("home") or 0
+    ht_away = ht.get("away") or 0
 
-    cards = match.get("cards", {}).get("red", {})
-    red_home = cards.get("home", 0)
-    red_away = cards.get("away", 0)
+    red_home, red_away = match_stats.red_cards(match)
 
     score_line = f"⚽ Score: {home} {goals_home} - {goals_away} {away}"
 
@@ -158,13 +228,11 @@ async def main():
         prediction_line = random.choice(PREDICTIONS).format(team=team)
         outcome_line = f"📌 MATCH OUTCOME : {team.upper()} WIN"
 
-    match_no = get_match_counter()
-
     opener_block = f"""📊 MATCH No: {match_no}
 🔴 LIVE MATCH 🔴
 {random.choice(ATTENTION_LINES)}"""
 
-    message = f"""{opener_block}
+    return f"""{opener_block}
 
 🏆 {league}
 ⏱️ {minute}' ({status})
@@ -180,12 +248,74 @@ async def main():
 {random.choice(CLOSERS)}
 """
 
-    async with TelegramClient("phantom_session", api_id, api_hash) as client:
-        await client.send_message(channel_id, message)
-
-    print("✅ Live match post sent successfully")
 
 # =====================
-# RUN
+# WORKER
 # =====================
-asyncio.run(main())
+async def run_cycle(fanout, api_budget, api_key=API_KEY, limit=LIVE_TIPS_PER_CYCLE):
+    # One live-tip pass; main.py calls it from its own event loop with its
+    # fanout and quota manager, the CLI below with freshly made ones.
+    # Returns the number of tips posted.
+    live = await fetch_live_fixtures(api_budget, api_key)
+    fixtures, boards = await asyncio.to_thread(claim_fixtures, live, limit)
+    if not fixtures:
+        print("No live major matches right now.")
+        return 0
+
+    await attach_statistics(fixtures, api_budget, api_key)
+
+    # With a live board, a fixture tipped earlier (by any run) gets its
+    # post edited (same match number) instead of a new one
+    if not live_board.enabled():
+        boards = [None] * len(fixtures)
+    fresh = sum(1 for b in boards if b is None)
+    next_no = await asyncio.to_thread(reserve_match_numbers, fresh) if fresh else None
+
+    numbers = []
+    for b in boards:
+        if b is None:
+            numbers.append(next_no)
+            next_no += 1
+        else:
+            numbers.append(b[0])
+
+    results = await asyncio.gather(*(
+        fanout.publish(build_live_post(m, no), b[1] if b else None)
+        for m, no, b in zip(fixtures, numbers, boards)
+    ), return_exceptions=True)
+
+    posted = 0
+    failed = []
+    posted_boards = {}
+    for m, no, result in zip(fixtures, numbers, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ Live tip for {m['fixture']['id']} failed: {result!r}")
+            failed.append(m["fixture"]["id"])
+            continue
+        if live_board.enabled():
+            posted_boards[m["fixture"]["id"]] = [no, result[1]]
+        posted += 1
+
+    if failed or posted_boards:
+        await asyncio.to_thread(settle_fixtures, failed, posted_boards)
+
+    print(f"✅ {posted} live match post(s) sent")
+    return posted
+
+
+async def main():
+    # Same persisted budget as main.py, so the two scripts share the quota
+    api_budget = QuotaManager()
+    async with TelegramClient("phantom_session", api_id, api_hash) as client:
+        sender = SendQueue(client)
+        try:
+            await run_cycle(FanOut(sender, load_targets(channel_id)), api_budget)
+        finally:
+            await sender.close()
+            api_budget.save()
+            await http_client.close()
+            metrics.flush()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+import random
+
+import match_stats
+import metrics
+
+# Both bots' tip logic lives here so it can be imported (and backtested)
+# without Telegram credentials or network access. Each rule function
+# returns (outcome, rule) so a backtest can attribute hits to the branch
+# that produced them; rng defaults to the module-level random.
+
+SHOTS_DRAW_BAND = 1
+
+
+# =====================
+# MAIN.PY BASE OUTCOME
+# =====================
+def shots_on_goal(match):
+    # (home, away) "Shots on Goal" from a fixture's statistics, or None
+    table = match_stats.table_for(match)
+    if table is None:
+        return None
+    return match_stats.pair(table, match_stats.SHOTS_ON_GOAL)
+
+
+def base_outcome_rule(shots, odds, rng=random, draw_band=SHOTS_DRAW_BAND):
+    if shots is None:
+        # If odds available, trust market
+        if odds and odds.get("home") and odds.get("away"):
+            if odds["home"] < odds["away"]:
+                return "home", "odds"
+            elif odds["away"] < odds["home"]:
+                return "away", "odds"
+
+        # Home advantage fallback
+        r = rng.random()
+        if r < 0.50:
+            return "home", "random"
+        elif r < 0.72:
+            return "draw", "random"
+        else:
+            return "away", "random"
+
+    home_shots, away_shots = shots
+    if abs(home_shots - away_shots) <= draw_band:
+        return "draw", "shots_draw_band"
+    return ("home" if home_shots > away_shots else "away"), "shots_lead"
+
+
+@metrics.timed("predict_base_outcome")
+def predict_base_outcome(match, rng=random):
+    return base_outcome_rule(shots_on_goal(match), match.get("odds"), rng)[0]
+
+
+# =====================
+# POSTMATCH.PY LIVE OUTCOME
+# =====================
+def outcome_rule(ht_home, ht_away, red_home, red_away, rng=random):
+    if red_home > red_away:
+        return rng.choices(["away", "draw"], weights=[70, 30])[0], "red_home"
+    if red_away > red_home:
+        return rng.choices(["home", "draw"], weights=[70, 30])[0], "red_away"
+
+    if ht_home == 0 and ht_away == 0:
+        return rng.choice(["home", "away", "draw"]), "ht_0_0"
+
+    if ht_home == 1 and ht_away == 0:
+        return rng.choices(["home", "draw"], weights=[70, 30])[0], "ht_1_0"
+
+    if ht_home == 0 and ht_away == 1:
+        return rng.choices(["away", "draw"], weights=[70, 30])[0], "ht_0_1"
+
+    if ht_home - ht_away >= 2:
+        return rng.choices(["home", "draw"], weights=[85, 15])[0], "ht_home_2plus"
+
+    if ht_away - ht_home >= 2:
+        return rng.choices(["away", "draw"], weights=[85, 15])[0], "ht_away_2plus"
+
+    return rng.choice(["home", "away", "draw"]), "ht_other"
+
+
+def predict_outcome(ht_home, ht_away, red_home, red_away, rng=random):
+    return outcome_rule(ht_home, ht_away, red_home, red_away, rng)[0]
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+from collections import Counter, deque
+
+import clock
+import http_client
+from state_store import read_json, write_atomic
+
+# =====================
+# QUOTA CONFIG
+# =====================
+QUOTA_FILE = os.environ.get("API_QUOTA_FILE", "api_quota.json")
+
+# Plan defaults until the first response tells us the real limits
+DAILY_LIMIT = int(os.environ.get("API_DAILY_LIMIT", "7500"))
+PER_MINUTE_LIMIT = int(os.environ.get("API_PER_MINUTE_LIMIT", "300"))
+MINUTE = 60
+RATE_LIMITED_BACKOFF_SECONDS = 60
+
+# Priorities, most urgent first
+LIVE = 0
+ODDS = 1
+FIXTURES = 2
+PRIORITY_NAMES = {LIVE: "live", ODDS: "odds", FIXTURES: "fixtures"}
+
+# Share of the daily limit kept back from each priority, so odds and
+# fixture refreshes are deferred well before live scores would run dry
+DAILY_RESERVE = {LIVE: 0.0, ODDS: 0.03, FIXTURES: 0.05}
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+# =====================
+# QUOTA MANAGER
+# =====================
+class QuotaManager:
+    # Shared by every api-sports call of a process. Keeps the daily budget
+    # (persisted, so cron runs and postmatch.py see each other's spend) and
+    # a one-minute sliding window; when the window is full, waiting calls
+    # go out in priority order. Identical GETs in flight are merged.
+
+    def __init__(self, path=QUOTA_FILE):
+        self.path = path
+        data = read_json(path) or {}
+        self.day = data.get("day")
+        self.daily_limit = data.get("daily_limit", DAILY_LIMIT)
+        self.daily_remaining = data.get("daily_remaining")
+        self.minute_limit = data.get("minute_limit", PER_MINUTE_LIMIT)
+        self.used = Counter(data.get("used", {}))
+        self.deferred = Counter(data.get("deferred", {}))
+        self.blocked_until = 0.0
+        self.dirty = False
+        self._window = deque()
+        self._waiting = Counter()
+        self._in_flight = {}
+        self._rollover()
+
+    # ---------- budget ----------
+
+    def _rollover(self):
+        # api-sports resets the daily counter at 00:00 UTC
+        today = clock.now().strftime("%Y-%m-%d")
+        if self.day != today:
+            self.day = today
+            self.daily_remaining = None
+            self.used.clear()
+            self.deferred.clear()
+
+    def remaining(self):
+        if self.daily_remaining is None:
+            return self.daily_limit - sum(self.used.values())
+        return self.daily_remaining
+
+    def allows(self, priority):
+        self._rollover()
+        return self.remaining() > self.daily_limit * DAILY_RESERVE[priority]
+
+    def observe(self, headers):
+        # Daily counters come as x-ratelimit-requests-*, per-minute ones
+        # as X-RateLimit-* (header lookup is case-insensitive)
+        def header_int(name):
+            try:
+                return int(headers[name])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        daily_limit = header_int("x-ratelimit-requests-limit")
+        daily_remaining = header_int("x-ratelimit-requests-remaining")
+        minute_limit = header_int("x-ratelimit-limit")
+        minute_remaining = header_int("x-ratelimit-remaining")
+
+        if daily_limit:
+            self.daily_limit = daily_limit
+        if daily_remaining is not None:
+            self.daily_remaining = daily_remaining
+        if minute_limit:
+            self.minute_limit = minute_limit
+        if minute_remaining == 0:
+            self.blocked_until = max(self.blocked_until, clock.now().timestamp() + MINUTE)
+
+    # ---------- per-minute window ----------
+
+    def _minute_wait(self, now_ts):
+        while self._window and self._window[0] <= now_ts - MINUTE:
+            self._window.popleft()
+        wait = self.blocked_until - now_ts
+        if len(self._window) >= self.minute_limit:
+            wait = max(wait, self._window[0] + MINUTE - now_ts)
+        return wait
+
+    async def _acquire(self, priority):
+        self._waiting[priority] += 1
+        try:
+            while True:
+                now_ts = clock.now().timestamp()
+                wait = self._minute_wait(now_ts)
+                if wait > 0:
+                    await clock.sleep(wait)
+                elif any(self._waiting[p] for p in range(priority)):
+                    # A more urgent call is queued for the same free slot
+                    await asyncio.sleep(0)
+                else:
+                    self._window.append(now_ts)
+                    return
+        finally:
+            self._waiting[priority] -= 1
+
+    # ---------- requests ----------
+
+    async def get_json(self, url, headers=None, params=None, priority=FIXTURES, timeout=None, parse=None):
+        key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())), parse)
+        task = self._in_flight.get(key)
+        if task is None:
+            if not self.allows(priority):
+                self.deferred[PRIORITY_NAMES[priority]] += 1
+                self.dirty = True
+                raise QuotaExhausted(
+                    f"{PRIORITY_NAMES[priority]} call deferred, {self.remaining()} requests left today"
+                )
+            task = asyncio.ensure_future(self._request(url, headers, params, priority, timeout, parse))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _request(self, url, headers, params, priority, timeout, parse=None):
+        import aiohttp
+
+        await self._acquire(priority)
+        self.used[PRIORITY_NAMES[priority]] += 1
+        self.dirty = True
+        if self.daily_remaining is not None:
+            self.daily_remaining -= 1
+
+        try:
+            data, response_headers = await http_client.get_json_with_headers(
+                url, headers=headers, params=params, timeout=timeout, parse=parse
+            )
+        except aiohttp.ClientResponseError as e:
+            if e.headers:
+                self.observe(e.headers)
+            if e.status == 429:
+                self.blocked_until = max(
+                    self.blocked_until, clock.now().timestamp() + RATE_LIMITED_BACKOFF_SECONDS
+                )
+            raise
+
+        self.observe(response_headers)
+        return data
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        write_atomic(self.path, json.dumps({
+            "day": self.day,
+            "daily_limit": self.daily_limit,
+            "daily_remaining": self.daily_remaining,
+            "minute_limit": self.minute_limit,
+            "used": dict(self.used),
+            "deferred": dict(self.deferred),
+        }))
@@ -0,0 +1,71 @@
+import heapq
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+# =====================
+# RANKING CONFIG
+# =====================
+RANKING_FILE = os.environ.get(
+    "RANKING_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ranking.json")
+)
+
+_NOISE_TOKENS = {"fc", "cf", "afc", "sc"}
+
+
+@lru_cache(maxsize=4096)
+def normalize_team(name):
+    # "Paris Saint-Germain FC" -> "paris saint germain"
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    tokens = re.split(r"[^a-z0-9]+", name)
+    return " ".join(t for t in tokens if t and t not in _NOISE_TOKENS)
+
+
+# =====================
+# RANKING
+# =====================
+class Ranking:
+    # Precomputed lookup tables for match_importance_score: league id ->
+    # priority and normalized team name (aliases included) -> boost.
+
+    def __init__(self, league_priority, team_boost):
+        self.league_priority = dict(league_priority)
+        self.team_boost = dict(team_boost)
+        self.league_ids = frozenset(self.league_priority)
+
+    @classmethod
+    def from_config(cls, config):
+        league_priority = {int(lg["id"]): lg["priority"] for lg in config.get("leagues", [])}
+
+        default_boost = config.get("club_boost", 0)
+        team_boost = {}
+        for club in config.get("clubs", []):
+            boost = club.get("boost", default_boost)
+            for name in [club["name"], *club.get("aliases", [])]:
+                team_boost[normalize_team(name)] = boost
+
+        return cls(league_priority, team_boost)
+
+    @classmethod
+    def from_file(cls, path=RANKING_FILE):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def boost(self, team_name):
+        return self.team_boost.get(normalize_team(team_name), 0)
+
+    def score(self, match):
+        teams = match["teams"]
+        return (
+            self.league_priority.get(match["league"]["id"], 0)
+            + self.boost(teams["home"]["name"])
+            + self.boost(teams["away"]["name"])
+        )
+
+    def top(self, fixtures, k):
+        # Same order as sorted(..., reverse=True)[:k] without the full sort
+        return heapq.nlargest(k, fixtures, key=self.score)
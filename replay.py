@@ -0,0 +1,586 @@
+import argparse
+import asyncio
+import bisect
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from aiohttp import web
+
+# =====================
+# RECORDING FORMAT
+# =====================
+# {
+#   "start": "2026-06-14T05:00:00+00:00",        simulated clock start
+#   "end":   "2026-06-15T02:00:00+00:00",        simulated clock end
+#   "fixtures_by_date": {"2026-06-14": [<api-sports fixture>, ...]},
+#   "odds": {"<fixture id>": [<api-sports /odds response item>, ...]},
+#   "timeline": {"<fixture id>": [
+#       {"at": "...", "status": "1H", "elapsed": 0, "goals": [0, 0]},
+#       {"at": "...", "status": "HT", "elapsed": 45, "goals": [1, 0], "halftime": [1, 0]},
+#       ...
+#   ]}
+# }
+# A timeline entry holds until the next one; while a half is in play the
+# stand-in keeps advancing "elapsed" with the simulated clock.
+IN_PLAY = {"1H", "2H", "ET"}
+LIVE_STATUSES = {"1H", "HT", "2H", "ET", "BT", "P"}
+
+
+def parse_time(s):
+    return datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+
+def iso(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+class Recording:
+    def __init__(self, data):
+        self.start = parse_time(data["start"])
+        self.end = parse_time(data["end"])
+        self.odds = data.get("odds", {})
+        self.fixtures = {}
+        self.by_date = {}
+        for date_str, fixtures in data.get("fixtures_by_date", {}).items():
+            self.by_date[date_str] = [m["fixture"]["id"] for m in fixtures]
+            for m in fixtures:
+                self.fixtures[str(m["fixture"]["id"])] = m
+
+        self.timelines = {}
+        for fid, entries in data.get("timeline", {}).items():
+            entries = sorted(entries, key=lambda e: e["at"])
+            self.timelines[fid] = ([parse_time(e["at"]) for e in entries], entries)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def snapshot(self, fid, now):
+        times, entries = self.timelines.get(fid, ((), ()))
+        i = bisect.bisect_right(times, now) - 1
+        if i < 0:
+            return None
+        snap = dict(entries[i])
+        if snap["status"] in IN_PLAY:
+            snap["elapsed"] = snap.get("elapsed", 0) + int((now - times[i]).total_seconds() // 60)
+        return snap
+
+    def fixture_at(self, fid, now):
+        m = self.fixtures[fid]
+        snap = self.snapshot(fid, now)
+        out = dict(m)
+        out["fixture"] = dict(m["fixture"])
+        if snap is None:
+            out["fixture"]["status"] = {"short": "NS", "elapsed": None}
+            out["goals"] = {"home": None, "away": None}
+            return out
+
+        out["fixture"]["status"] = {"short": snap["status"], "elapsed": snap.get("elapsed")}
+        out["goals"] = {"home": snap["goals"][0], "away": snap["goals"][1]}
+        ht = snap.get("halftime")
+        out["score"] = {"halftime": {"home": ht[0], "away": ht[1]} if ht else {"home": None, "away": None}}
+        if "statistics" in snap:
+            out["statistics"] = snap["statistics"]
+        return out
+
+    def live_odds_at(self, fid, now):
+        # Recorded in-play odds are rare, so the live line is derived from
+        # the pre-match one: the leading side shortens with each goal of
+        # margin and the draw shortens (level) or drifts (not) as time runs
+        snap = self.snapshot(fid, now)
+        if snap is None or snap["status"] not in LIVE_STATUSES:
+            return None
+        try:
+            values = self.odds[fid][0]["bookmakers"][0]["bets"][0]["values"]
+        except (KeyError, IndexError):
+            return None
+
+        price = {v["value"]: float(v["odd"]) for v in values}
+        diff = snap["goals"][0] - snap["goals"][1]
+        late = 1 + (snap.get("elapsed") or 0) / 90
+        live = {
+            "Home": price["Home"] * 1.6 ** -diff,
+            "Draw": price["Draw"] * (late if diff else 1 / late),
+            "Away": price["Away"] * 1.6 ** diff,
+        }
+        return {
+            "fixture": {"id": int(fid), "status": {"short": snap["status"], "elapsed": snap.get("elapsed")}},
+            "odds": [{"id": 59, "name": "Fulltime Result", "values": [
+                {"value": k, "odd": f"{max(1.01, p):.2f}", "suspended": False} for k, p in live.items()
+            ]}],
+        }
+
+
+# =====================
+# SYNTHETIC DAY
+# =====================
+SYNTH_LEAGUES = [
+    (2, "UEFA Champions League"), (39, "Premier League"), (140, "La Liga"),
+    (135, "Serie A"), (78, "Bundesliga"), (3, "UEFA Europa League"),
+]
+
+
+def synthesize(n_matches, day, seed=0):
+    # A plausible match day: kickoffs every 15 minutes from 12:00 to 21:00
+    # UTC, random goals in each half, a single bookmaker's 1X2 odds.
+    rng = random.Random(seed)
+    day = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    fixtures, odds, timeline = [], {}, {}
+
+    for i in range(n_matches):
+        fid = 900000 + i
+        league_id, league_name = SYNTH_LEAGUES[i % len(SYNTH_LEAGUES)]
+        kickoff = day + timedelta(hours=12, minutes=15 * rng.randrange(37))
+        fixtures.append({
+            "fixture": {"id": fid, "date": iso(kickoff), "status": {"short": "NS", "elapsed": None}},
+            "league": {"id": league_id, "name": league_name, "season": day.year},
+            "teams": {
+                "home": {"id": 2 * i + 1, "name": f"Home {i}"},
+                "away": {"id": 2 * i + 2, "name": f"Away {i}"},
+            },
+            "goals": {"home": None, "away": None},
+        })
+
+        home, draw, away = (round(rng.uniform(1.3, 6.0), 2) for _ in range(3))
+        odds[str(fid)] = [{"bookmakers": [{"id": 8, "name": "Bet365", "bets": [{
+            "id": 1, "name": "Match Winner", "values": [
+                {"value": "Home", "odd": str(home)},
+                {"value": "Draw", "odd": str(draw)},
+                {"value": "Away", "odd": str(away)},
+            ]}]}]}]
+
+        goals = [0, 0]
+        entries = [{"at": iso(kickoff), "status": "1H", "elapsed": 0, "goals": [0, 0]}]
+        for half, (start, offset) in enumerate(((0, 0), (45, 62))):
+            for minute in sorted(rng.sample(range(1, 45), rng.choice([0, 0, 1, 1, 2]))):
+                goals[rng.random() < 0.45] += 1
+                entries.append({
+                    "at": iso(kickoff + timedelta(minutes=offset + minute)),
+                    "status": "1H" if half == 0 else "2H",
+                    "elapsed": start + minute,
+                    "goals": list(goals)
+                })
+            if half == 0:
+                ht = list(goals)
+                entries.append({"at": iso(kickoff + timedelta(minutes=47)), "status": "HT",
+                                "elapsed": 45, "goals": list(goals), "halftime": ht})
+                entries.append({"at": iso(kickoff + timedelta(minutes=62)), "status": "2H",
+                                "elapsed": 46, "goals": list(goals), "halftime": ht})
+        entries.append({"at": iso(kickoff + timedelta(minutes=110)), "status": "FT",
+                        "elapsed": 90, "goals": list(goals), "halftime": ht})
+        timeline[str(fid)] = entries
+
+    return {
+        "start": iso(day + timedelta(hours=5)),
+        "end": iso(day + timedelta(days=1, hours=2)),
+        "fixtures_by_date": {day.strftime("%Y-%m-%d"): fixtures},
+        "odds": odds,
+        "timeline": timeline,
+    }
+
+
+# =====================
+# SIMULATED CLOCK
+# =====================
+class SimClock:
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+
+# =====================
+# LOCAL API STAND-IN
+# =====================
+class StandIn:
+    # Serves api-sports /fixtures, /odds and /odds/live from a Recording and a fake
+    # GitHub Gist, counting every call and byte.
+
+    def __init__(self, recording, sim_clock):
+        self.recording = recording
+        self.clock = sim_clock
+        self.calls = Counter()
+        self.bytes = 0
+        self.gist = {"content": None, "updated_at": "", "version": 0}
+        self.daily_limit = 7500
+        self.runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/fixtures", self.fixtures)
+        self.app.router.add_get("/fixtures/statistics", self.statistics)
+        self.app.router.add_get("/odds", self.odds)
+        self.app.router.add_get("/odds/live", self.odds_live)
+        self.app.router.add_get("/gists/{gist_id}", self.gist_get)
+        self.app.router.add_patch("/gists/{gist_id}", self.gist_patch)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def _json(self, data, status=200, headers=None):
+        body = json.dumps(data)
+        self.bytes += len(body)
+        headers = dict(headers or {})
+        headers.setdefault("x-ratelimit-requests-limit", str(self.daily_limit))
+        headers.setdefault("x-ratelimit-requests-remaining", str(max(0, self.daily_limit - self.total_calls)))
+        return web.Response(text=body, status=status, content_type="application/json", headers=headers)
+
+    async def fixtures(self, request):
+        q = request.query
+        now = self.clock.now()
+        rec = self.recording
+
+        if "ids" in q:
+            self.calls["fixtures:ids"] += 1
+            ids = [i for i in q["ids"].split("-") if i in rec.fixtures]
+            response = [rec.fixture_at(i, now) for i in ids]
+        elif q.get("live") == "all":
+            self.calls["fixtures:live"] += 1
+            response = [
+                m for m in (rec.fixture_at(fid, now) for fid in rec.fixtures)
+                if m["fixture"]["status"]["short"] in LIVE_STATUSES
+            ]
+        else:
+            self.calls["fixtures:league" if "league" in q else "fixtures:date"] += 1
+            ids = rec.by_date.get(q.get("date"), [])
+            response = [rec.fixture_at(str(i), now) for i in ids]
+            if "league" in q:
+                response = [m for m in response if str(m["league"]["id"]) == q["league"]]
+
+        return self._json({"response": response})
+
+    async def statistics(self, request):
+        self.calls["fixtures:statistics"] += 1
+        fid = request.query.get("fixture")
+        if fid not in self.recording.fixtures:
+            return self._json({"response": []})
+        return self._json({"response": self.recording.fixture_at(fid, self.clock.now()).get("statistics", [])})
+
+    async def odds(self, request):
+        self.calls["odds"] += 1
+        return self._json({"response": self.recording.odds.get(request.query.get("fixture"), [])})
+
+    async def odds_live(self, request):
+        self.calls["odds:live"] += 1
+        fid = request.query.get("fixture")
+        now = self.clock.now()
+        response = [
+            item for item in (
+                self.recording.live_odds_at(f, now)
+                for f in ([fid] if fid else self.recording.fixtures)
+            ) if item
+        ]
+        return self._json({"response": response})
+
+    async def gist_get(self, request):
+        self.calls["gist:get"] += 1
+        etag = f'"v{self.gist["version"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+
+        files = {}
+        if self.gist["content"] is not None:
+            files["match_state.json"] = {"content": self.gist["content"]}
+        return self._json({"files": files, "updated_at": self.gist["updated_at"]}, headers={"ETag": etag})
+
+    async def gist_patch(self, request):
+        self.calls["gist:patch"] += 1
+        payload = await request.json()
+        self.gist["content"] = payload["files"]["match_state.json"]["content"]
+        self.gist["version"] += 1
+        self.gist["updated_at"] = iso(self.clock.now())
+        return self._json({"updated_at": self.gist["updated_at"]})
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+
+# =====================
+# FAKE TELEGRAM
+# =====================
+class FakeTelegramClient:
+    def __init__(self, sim_clock):
+        self.clock = sim_clock
+        self.sent = []
+        self.edits = []
+        self._next_id = 1
+
+    async def get_input_entity(self, peer):
+        return peer
+
+    async def send_message(self, entity, message, **kwargs):
+        msg = SimpleNamespace(id=self._next_id, chat_id=entity, text=message)
+        self._next_id += 1
+        self.sent.append({"at": iso(self.clock.now()), "chat": entity, "id": msg.id, "text": message})
+        return msg
+
+    async def edit_message(self, entity, message, text=None, **kwargs):
+        msg_id = getattr(message, "id", message)
+        self.edits.append({"at": iso(self.clock.now()), "chat": entity, "id": msg_id, "text": text})
+        return SimpleNamespace(id=msg_id, chat_id=entity, text=text)
+
+    async def disconnect(self):
+        pass
+
+
+# =====================
+# HARNESS
+# =====================
+def load_main(base_url, workdir):
+    # main.py and its helpers read their configuration at import time
+    os.environ["FOOTBALL_API_URL"] = base_url
+    os.environ["GITHUB_API_URL"] = base_url
+    os.environ["GIST_ID"] = "replay"
+    os.environ["GH_TOKEN"] = "replay"
+    os.environ["STATE_FILE"] = os.path.join(workdir, "match_state.json")
+    os.environ["FIXTURE_CACHE_FILE"] = os.path.join(workdir, "fixture_cache.json")
+    os.environ["API_QUOTA_FILE"] = os.path.join(workdir, "api_quota.json")
+    os.environ["ODDS_CACHE_FILE"] = os.path.join(workdir, "odds_cache.json")
+    os.environ["MATCH_COUNTER_FILE"] = os.path.join(workdir, "match_counter.txt")
+    os.environ["LIVE_TIPS_FILE"] = os.path.join(workdir, "live_tips.json")
+    os.environ.pop("TELEGRAM_TARGETS_FILE", None)
+    for key, value in (
+        ("TELEGRAM_API_ID", "1"), ("TELEGRAM_API_HASH", "replay"),
+        ("TELEGRAM_CHANNEL_ID", "-1000000000001"), ("FOOTBALL_API_KEY", "replay"),
+        ("TELEGRAM_BOT_TOKEN", "replay"),
+    ):
+        os.environ.setdefault(key, value)
+
+    return importlib.import_module("main")
+
+
+class Harness:
+    # Drives job_morning/job_check against a StandIn and a FakeTelegramClient
+    # on a simulated clock, one tick every `step` simulated seconds.
+
+    def __init__(self, recording, step=60, speed=100.0):
+        self.recording = recording
+        self.step = step
+        self.speed = speed
+        self.clock = SimClock(recording.start)
+        self.standin = StandIn(recording, self.clock)
+        self.telegram = FakeTelegramClient(self.clock)
+        self.ticks = []
+        self.main = None
+        self._workdir = None
+
+    async def __aenter__(self):
+        base_url = await self.standin.start()
+        self._workdir = tempfile.TemporaryDirectory(prefix="phantom-replay-")
+        main = self.main = load_main(base_url, self._workdir.name)
+
+        import clock
+        import send_queue
+        import fanout
+        clock.now = self.clock.now
+
+        main.client = self.telegram
+        main.sender = send_queue.SendQueue(self.telegram)
+        main.fanout = fanout.FanOut(main.sender, fanout.load_targets(main.channel_id))
+        for t in main.fanout.targets:
+            # Telegram limits apply to wall-clock time; the replay runs faster
+            main.sender.configure_chat(t["chat_id"], 60000)
+        main.sender.global_bucket.rate = 1e6
+        # Same for the api-sports minute window: the simulated clock only
+        # moves between ticks, so a call queued for the next minute would
+        # wait forever
+        main.api_budget.minute_limit = 10 ** 6
+        return self
+
+    async def __aexit__(self, *exc):
+        import http_client
+        import metrics
+        await self.main.sender.close()
+        await self.main.store.close()
+        await http_client.close()
+        metrics.flush()
+        await self.standin.stop()
+        self._workdir.cleanup()
+
+    async def tick(self):
+        main = self.main
+        now = self.clock.now()
+        calls, sent = self.standin.total_calls, len(self.telegram.sent)
+
+        started = time.perf_counter()
+        today = now.strftime("%Y-%m-%d")
+        if getattr(self, "_morning", None) != today and now.hour >= main.MORNING_HOUR_UTC:
+            await main.job_morning()
+            self._morning = today
+        await main.job_check()
+        elapsed = time.perf_counter() - started
+
+        self.ticks.append({
+            "at": iso(now),
+            "seconds": elapsed,
+            "api_calls": self.standin.total_calls - calls,
+            "sends": len(self.telegram.sent) - sent,
+        })
+
+    async def run(self):
+        while self.clock.now() < self.recording.end:
+            await self.tick()
+            self.clock.advance(self.step)
+            if self.speed:
+                await asyncio.sleep(self.step / self.speed)
+        return self.summary()
+
+    async def run_daemon(self):
+        # Let main.run_daemon choose its own wake-ups; its sleeps advance the
+        # simulated clock instead of waiting. A tick is the real work done
+        # between two sleeps.
+        import clock
+        store = self.main.store
+        finished = asyncio.Event()
+        woke = {}
+
+        def wake():
+            woke.update(at=iso(self.clock.now()), started=time.perf_counter(),
+                        calls=self.standin.total_calls, sent=len(self.telegram.sent))
+
+        async def sim_sleep(seconds):
+            self.ticks.append({
+                "at": woke["at"],
+                "seconds": time.perf_counter() - woke["started"],
+                "api_calls": self.standin.total_calls - woke["calls"],
+                "sends": len(self.telegram.sent) - woke["sent"],
+            })
+            # The debounce timer runs on the real loop clock, which barely
+            # moves here; fire it if it would have fired during this sleep
+            if store.dirty and seconds >= (store.debounce_seconds or 0):
+                await store.flush()
+            if self.clock.now() + timedelta(seconds=seconds) >= self.recording.end:
+                finished.set()
+                await asyncio.Event().wait()
+            self.clock.advance(seconds)
+            await asyncio.sleep(seconds / self.speed if self.speed else 0)
+            wake()
+
+        clock.sleep = sim_sleep
+        wake()
+        daemon = asyncio.ensure_future(self.main.run_daemon())
+        done, _ = await asyncio.wait(
+            [daemon, asyncio.ensure_future(finished.wait())],
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        daemon.cancel()
+        await asyncio.gather(daemon, return_exceptions=True)
+        # Pending writes and Gist mirroring belong to the day being replayed
+        await store.close()
+        return self.summary()
+
+    def transcript(self):
+        # Random tip wording is left out so runs compare across seeds
+        return [
+            {"at": s["at"], "chat": s["chat"], "headline": s["text"].strip().splitlines()[0]}
+            for s in self.telegram.sent
+        ]
+
+    def summary(self):
+        latencies = sorted(t["seconds"] for t in self.ticks) or [0.0]
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            "ticks": len(self.ticks),
+            "sends": len(self.telegram.sent),
+            "edits": len(self.telegram.edits),
+            "api_calls": dict(self.standin.calls),
+            "bytes_served": self.standin.bytes,
+            "state_writes": self.main.store.writes,
+            "tick_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+
+def compare_transcripts(expected, actual):
+    diffs = []
+    for i in range(max(len(expected), len(actual))):
+        e = expected[i] if i < len(expected) else None
+        a = actual[i] if i < len(actual) else None
+        if e != a:
+            diffs.append({"index": i, "expected": e, "actual": a})
+    return diffs
+
+
+# =====================
+# CLI
+# =====================
+async def run_replay(args):
+    recording = Recording.load(args.recording)
+    async with Harness(recording, step=args.step, speed=args.speed) as harness:
+        summary = await (harness.run_daemon() if args.daemon else harness.run())
+        transcript = harness.transcript()
+
+    print(json.dumps(summary, indent=2))
+
+    if args.transcript:
+        with open(args.transcript, "w", encoding="utf-8") as f:
+            json.dump(transcript, f, indent=2, ensure_ascii=False)
+
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            diffs = compare_transcripts(json.load(f), transcript)
+        if diffs:
+            print(f"❌ Transcript differs in {len(diffs)} place(s)")
+            for d in diffs[:20]:
+                print(json.dumps(d, ensure_ascii=False))
+            return 1
+        print("✅ Transcript matches")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded match day against local stand-ins.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="replay a recording")
+    run.add_argument("recording")
+    run.add_argument("--speed", type=float, default=100.0, help="simulated seconds per real second (0 = no waiting)")
+    run.add_argument("--step", type=int, default=60, help="simulated seconds between check ticks")
+    run.add_argument("--daemon", action="store_true",
+                     help="drive main.run_daemon's event loop instead of fixed check ticks")
+    run.add_argument("--transcript", help="write the sent-message transcript here")
+    run.add_argument("--check", help="compare against an expected transcript, exit 1 on differences")
+
+    synth = sub.add_parser("synth", help="write a synthetic recording")
+    synth.add_argument("out")
+    synth.add_argument("--matches", type=int, default=5)
+    synth.add_argument("--date", default=datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+    synth.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "synth":
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(synthesize(args.matches, args.date, args.seed), f)
+        return 0
+
+    random.seed(0)
+    return asyncio.run(run_replay(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import heapq
+import itertools
+
+# =====================
+# EVENT QUEUE
+# =====================
+MORNING = "morning"
+MATCH = "match"
+HEARTBEAT = "heartbeat"
+LIVE_TIPS = "live_tips"
+
+
+class Scheduler:
+    # Min-heap of (when, seq, kind, key) events. A match is scheduled at its
+    # lifecycle wake_at; re-scheduling just pushes a new entry and the old one
+    # is dropped when popped (lazy invalidation), so updates are O(log n).
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._current = {}
+
+    def __len__(self):
+        return len(self._current)
+
+    def schedule(self, kind, key, when):
+        self._current[(kind, key)] = when
+        heapq.heappush(self._heap, (when, next(self._seq), kind, key))
+
+    def is_scheduled(self, kind, key):
+        return (kind, key) in self._current
+
+    def cancel(self, kind, key):
+        self._current.pop((kind, key), None)
+
+    def next_time(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now_ts):
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now_ts:
+            _, _, kind, key = heapq.heappop(self._heap)
+            if self._current.pop((kind, key), None) is not None:
+                due.append((kind, key))
+            self._drop_stale()
+        return due
+
+    def sync_matches(self, matches, now_ts, poll_delay):
+        # Mirror every match's wake_at into the queue. A match that is still
+        # due after being handled (in play, polling the feed) comes back
+        # after poll_delay instead of spinning.
+        keys = set()
+        for m in matches:
+            key = m["match_id"]
+            keys.add(key)
+            wake = m.get("wake_at")
+            if wake is None:
+                self.cancel(MATCH, key)
+            elif wake > now_ts:
+                if self._current.get((MATCH, key)) != wake:
+                    self.schedule(MATCH, key, wake)
+            elif (MATCH, key) not in self._current:
+                self.schedule(MATCH, key, now_ts + poll_delay)
+
+        for kind, key in list(self._current):
+            if kind == MATCH and key not in keys:
+                self.cancel(kind, key)
+
+    def _drop_stale(self):
+        while self._heap:
+            when, _, kind, key = self._heap[0]
+            if self._current.get((kind, key)) == when:
+                return
+            heapq.heappop(self._heap)
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import time
+
+from telethon.errors import FloodWaitError, MessageIdInvalidError, MessageNotModifiedError, ServerError
+
+import metrics
+
+# =====================
+# TELEGRAM LIMITS
+# =====================
+# Bots may post roughly 20 messages per minute into one group/channel and
+# about 30 messages per second overall.
+PER_CHAT_RATE = float(os.environ.get("TELEGRAM_PER_CHAT_PER_MINUTE", "20")) / 60
+PER_CHAT_BURST = 3
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+
+MAX_RETRIES = 5
+MAX_FLOOD_WAIT_SECONDS = 15 * 60
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+TRANSIENT_ERRORS = (ConnectionError, asyncio.TimeoutError, ServerError)
+
+
+# =====================
+# TOKEN BUCKET
+# =====================
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        # Seconds until one token is available
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    async def acquire(self):
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+
+    def block(self, seconds):
+        # Telegram told us to back off: drain the bucket until then
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+# =====================
+# SEND QUEUE
+# =====================
+class SendQueue:
+    # One FIFO per chat so messages to a chat keep their order, with a
+    # per-chat and a global token bucket in front of client.send_message
+    # and client.edit_message.
+
+    def __init__(self, client):
+        self.client = client
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.buckets = {}
+        self.queues = {}
+        self.workers = {}
+        self.peers = {}
+        self.sent = 0
+        self.edits = 0
+        self.flood_waits = 0
+
+    def bucket_for(self, chat_id):
+        if chat_id not in self.buckets:
+            self.buckets[chat_id] = TokenBucket(PER_CHAT_RATE, PER_CHAT_BURST)
+        return self.buckets[chat_id]
+
+    async def warm_peers(self, chat_ids):
+        # Resolve each chat once (from the session's entity cache when it
+        # has one) so sends never need a get_entity round-trip
+        for chat_id in chat_ids:
+            if chat_id in self.peers:
+                continue
+            try:
+                self.peers[chat_id] = await self.client.get_input_entity(chat_id)
+            except (ValueError, TypeError) as e:
+                print(f"⚠️ Could not resolve {chat_id} up front: {e!r}")
+
+    def configure_chat(self, chat_id, per_minute):
+        self.buckets[chat_id] = TokenBucket(per_minute / 60, PER_CHAT_BURST)
+
+    async def send(self, chat_id, text, **kwargs):
+        # Resolves to the sent Message once it has actually been delivered
+        return await self._enqueue(chat_id, text, kwargs, None)
+
+    async def edit(self, chat_id, message_id, text, **kwargs):
+        # Resolves to the edited Message, None if the text was unchanged, or
+        # a newly sent Message when the original one is gone
+        return await self._enqueue(chat_id, text, kwargs, message_id)
+
+    async def _enqueue(self, chat_id, text, kwargs, message_id):
+        future = asyncio.get_running_loop().create_future()
+
+        if chat_id not in self.queues:
+            self.queues[chat_id] = asyncio.Queue()
+            self.workers[chat_id] = asyncio.ensure_future(self._worker(chat_id))
+        await self.queues[chat_id].put((text, kwargs, message_id, future))
+
+        return await future
+
+    async def close(self):
+        for q in self.queues.values():
+            await q.join()
+        for w in self.workers.values():
+            w.cancel()
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+        self.queues.clear()
+        self.workers.clear()
+
+    async def _worker(self, chat_id):
+        q = self.queues[chat_id]
+        while True:
+            text, kwargs, message_id, future = await q.get()
+            try:
+                if not future.cancelled():
+                    result = await self._deliver(chat_id, text, kwargs, message_id)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                q.task_done()
+
+    async def _deliver(self, chat_id, text, kwargs, message_id=None):
+        bucket = self.bucket_for(chat_id)
+        attempt = 0
+
+        while True:
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                peer = self.peers.get(chat_id, chat_id)
+                if message_id is not None:
+                    try:
+                        with metrics.span("telegram_edit"):
+                            result = await self.client.edit_message(peer, message_id, text, **kwargs)
+                        self.edits += 1
+                        metrics.inc("edits")
+                        return result
+                    except MessageNotModifiedError:
+                        return None
+                    except MessageIdInvalidError:
+                        # Deleted in the meantime: post it again
+                        message_id = None
+
+                with metrics.span("telegram_send"):
+                    result = await self.client.send_message(peer, text, **kwargs)
+                self.sent += 1
+                metrics.inc("sends")
+                return result
+            except FloodWaitError as e:
+                # Does not count as a failed attempt: Telegram told us exactly how long
+                self.flood_waits += 1
+                metrics.inc("flood_waits")
+                if e.seconds > MAX_FLOOD_WAIT_SECONDS:
+                    raise
+                print(f"⏳ FloodWait {e.seconds}s for {chat_id}")
+                bucket.block(e.seconds)
+            except TRANSIENT_ERRORS as e:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    raise
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                print(f"⚠️ Send to {chat_id} failed ({e!r}), retry {attempt} in {delay:.0f}s")
+                await asyncio.sleep(delay)
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import http_client
+import metrics
+from http_client import GITHUB_API_URL
+
+GIST_ID = os.environ.get("GIST_ID")
+GH_TOKEN = os.environ.get("GH_TOKEN")
+STATE_FILENAME = "match_state.json"
+STATE_FILE = os.environ.get("STATE_FILE", STATE_FILENAME)
+
+REPLICA_SYNC_SECONDS = int(os.environ.get("REPLICA_SYNC_SECONDS", "300"))
+REPLICA_WAIT_SECONDS = 10
+
+
+def empty_state():
+    return {"matches": [], "date": None}
+
+
+def serialize(state):
+    return json.dumps(state, indent=2)
+
+
+# =====================
+# LOCAL FILE (PRIMARY)
+# =====================
+def write_atomic(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        print(f"⚠️ Ignoring unreadable {path}")
+        return None
+
+
+# =====================
+# GIST (REPLICA)
+# =====================
+def gist_configured():
+    return bool(GIST_ID and GH_TOKEN)
+
+
+async def fetch_gist(etag=None):
+    # Returns (state, etag, updated_at), or None when the Gist is unchanged
+    url = f"{GITHUB_API_URL}/gists/{GIST_ID}"
+    headers = {"Authorization": f"token {GH_TOKEN}"}
+    gist, etag = await http_client.get_json_conditional(url, etag=etag, headers=headers, timeout=10)
+    if gist is None:
+        return None
+
+    files = gist.get("files", {})
+    if STATE_FILENAME in files:
+        state = json.loads(files[STATE_FILENAME]["content"])
+    else:
+        state = empty_state()
+
+    return state, etag, gist.get("updated_at", "")
+
+
+async def save_gist(content):
+    url = f"{GITHUB_API_URL}/gists/{GIST_ID}"
+    headers = {"Authorization": f"token {GH_TOKEN}"}
+    payload = {
+        "files": {
+            STATE_FILENAME: {
+                "content": content
+            }
+        }
+    }
+    gist = await http_client.patch_json(url, payload, headers=headers, timeout=10)
+    return gist.get("updated_at", "")
+
+
+# =====================
+# STATE STORE
+# =====================
+class StateStore:
+    # The local file is the source of truth and is written atomically on
+    # every flush. The Gist is a replica: pushed in the background after a
+    # flush and read with If-None-Match, and only adopted when it was
+    # updated by someone else and we have no unsaved changes.
+    #
+    # All changes made during a job are coalesced into one write. With
+    # debounce_seconds set (daemon mode) commit() schedules the flush
+    # instead of doing it immediately.
+
+    def __init__(self, path=STATE_FILE, debounce_seconds=None):
+        self.path = path
+        self.meta_path = f"{path}.meta"
+        self.state = None
+        self.meta = {}
+        self.debounce_seconds = debounce_seconds
+        self.writes = 0
+        self._dirty = set()
+        self._saved = None
+        self._timer = None
+        self._remote = None
+        self._epoch = 0  # bumped by local changes and mirrors; see sync_remote
+        self._sync_task = None
+        self._mirror_task = None
+        self._last_sync = 0.0
+
+    async def get(self):
+        if self.state is None:
+            await self.load()
+        else:
+            self._adopt_remote()
+            self._maybe_sync()
+        return self.state
+
+    @metrics.timed("load_state")
+    async def load(self):
+        self.meta = read_json(self.meta_path) or {}
+        local = read_json(self.path)
+
+        if local is None:
+            # Cold start with nothing on disk: block on the replica once
+            self.state = None
+            await self.sync_remote()
+            self._set_clean(self._remote or empty_state())
+            self._remote = None
+            self._write_local()
+        else:
+            self._set_clean(local)
+            self._maybe_sync(force=True)
+
+        if self.meta.get("remote_dirty"):
+            self._start_mirror()
+        return self.state
+
+    def replace(self, state):
+        self.state = state
+        self._dirty.add("*")
+        self._supersede_remote()
+
+    def set(self, target, key, value):
+        # target is the state dict itself or one of its match dicts
+        if key in target and target[key] == value:
+            return
+        target[key] = value
+        self._dirty.add((target.get("match_id"), key))
+        self._supersede_remote()
+
+    @property
+    def dirty(self):
+        return bool(self._dirty)
+
+    async def flush(self):
+        self._cancel_timer()
+        if not self._dirty or self.state is None:
+            return False
+
+        with metrics.span("save_state"):
+            content = serialize(self.state)
+            self._dirty.clear()
+            if content == self._saved:
+                return False
+
+            self._saved = content
+            self.meta["remote_dirty"] = True
+            self._write_local()
+        self.writes += 1
+        metrics.inc("state_writes")
+        self._start_mirror()
+        return True
+
+    async def commit(self):
+        if self.debounce_seconds is None:
+            return await self.flush()
+
+        if self._dirty and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.debounce_seconds,
+                lambda: asyncio.ensure_future(self._flush_logged())
+            )
+        return False
+
+    async def close(self):
+        # Flush and give the replica a bounded amount of time to catch up
+        await self.flush()
+        pending = [t for t in (self._sync_task, self._mirror_task) if t and not t.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=REPLICA_WAIT_SECONDS)
+        self._adopt_remote()
+
+    # ---------------------
+    # replica sync
+    # ---------------------
+    async def sync_remote(self):
+        self._last_sync = time.monotonic()
+        if not gist_configured():
+            return
+
+        epoch = self._epoch
+        try:
+            result = await fetch_gist(self.meta.get("etag"))
+        except Exception as e:
+            print(f"⚠️ Gist replica unreachable: {e!r}")
+            return
+
+        if result is None:
+            return
+
+        remote, etag, updated_at = result
+        seen = self.meta.get("remote_updated_at", "")
+        newer = updated_at > seen
+        self.meta["etag"] = etag
+        self.meta["remote_updated_at"] = max(updated_at, seen)
+        # A snapshot fetched before a local change or a mirror is older than
+        # what we hold; keeping it would roll the local file back later
+        if self.state is None or (newer and epoch == self._epoch and serialize(remote) != self._saved):
+            self._remote = remote
+        self._write_meta()
+
+    async def mirror(self):
+        while self.meta.get("remote_dirty") and gist_configured():
+            content = self._saved
+            try:
+                updated_at = await save_gist(content)
+            except Exception as e:
+                print(f"⚠️ Gist mirror failed, will retry on next flush: {e!r}")
+                return
+
+            self.meta["remote_updated_at"] = updated_at
+            self.meta.pop("etag", None)
+            self._supersede_remote()
+            if content == self._saved:
+                self.meta["remote_dirty"] = False
+            self._write_meta()
+
+    def _maybe_sync(self, force=False):
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+        if force or time.monotonic() - self._last_sync >= REPLICA_SYNC_SECONDS:
+            self._sync_task = asyncio.ensure_future(self.sync_remote())
+
+    def _start_mirror(self):
+        if self._mirror_task is None or self._mirror_task.done():
+            self._mirror_task = asyncio.ensure_future(self.mirror())
+
+    def _supersede_remote(self):
+        # Local changes win over any Gist snapshot fetched so far
+        self._epoch += 1
+        self._remote = None
+
+    def _adopt_remote(self):
+        if self._remote is None:
+            return
+        if self._dirty or self.meta.get("remote_dirty"):
+            # Local changes win; the next mirror overwrites the Gist
+            print("⚠️ Gist changed remotely while local state was modified, keeping local")
+        else:
+            print("🔄 Adopting newer state from Gist")
+            self._set_clean(self._remote)
+            self._write_local()
+        self._remote = None
+
+    # ---------------------
+    # helpers
+    # ---------------------
+    def _set_clean(self, state):
+        self.state = state
+        self._saved = serialize(state)
+        self._dirty.clear()
+
+    def _write_local(self):
+        write_atomic(self.path, self._saved)
+        self._write_meta()
+
+    def _write_meta(self):
+        write_atomic(self.meta_path, json.dumps(self.meta))
+
+    async def _flush_logged(self):
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"⚠️ State flush failed: {e!r}")
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from fixture_stream import ArrayScanner, parser, project
+
+# parser() must agree with json.loads + league filter + project() on random
+# payloads cut at random chunk boundaries; run it after touching the regexes.
+ALLOWED = frozenset({39, 140, 2})
+LEAGUES = [39, 140, 2, 71, 72, 999]
+TRICKY = ['plain', 'with "quotes"', 'brackets [ ] { }', 'back\\slash\\', 'ünïcødé ⚽', '\\"}]', '']
+
+
+def random_fixture(rng, fid):
+    deep = {"x": [1]}
+    for _ in range(rng.randint(0, 8)):   # deeper than _nested(4) now and then
+        deep = {"d": [deep, rng.choice(TRICKY)]}
+    return {
+        "fixture": {"id": fid, "referee": rng.choice(TRICKY), "date": "2026-06-14T12:00:00+00:00",
+                    "status": {"long": rng.choice(TRICKY), "short": "NS", "elapsed": rng.choice([None, 45])},
+                    "venue": {"id": None, "name": rng.choice(TRICKY)}},
+        "league": {"id": rng.choice(LEAGUES), "name": rng.choice(TRICKY), "season": 2026, "round": "[1]"},
+        "teams": {"home": {"id": fid * 2, "name": rng.choice(TRICKY)},
+                  "away": {"id": fid * 2 + 1, "name": rng.choice(TRICKY)}},
+        "goals": {"home": None, "away": None},
+        "extra": deep,
+    }
+
+
+def random_body(rng):
+    fixtures = [random_fixture(rng, i + 1) for i in range(rng.randint(0, 40))]
+    doc = {"get": "fixtures", "parameters": {"date": "2026-06-14", "note": "response [x]"},
+           "errors": [], "results": len(fixtures), "paging": {"current": 1, "total": 1},
+           "response": fixtures}
+    return json.dumps(doc, indent=rng.choice([None, 1]), ensure_ascii=rng.random() < 0.5).encode()
+
+
+def parse_chunked(body, rng):
+    async def chunks():
+        i = 0
+        while i < len(body):
+            size = rng.choice([1, 2, 7, 64, 1024, 65536])
+            yield body[i:i + size]
+            i += size
+
+    return asyncio.run(parser(ALLOWED)(chunks()))["response"]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_parser_matches_json_loads(seed):
+    rng = random.Random(seed)
+    body = random_body(rng)
+    expected = [project(m) for m in json.loads(body)["response"] if m["league"]["id"] in ALLOWED]
+    assert parse_chunked(body, rng) == expected
+
+
+def test_truncated_body_is_rejected():
+    body = random_body(random.Random(0))
+    scanner = ArrayScanner("response")
+    scanner.feed(body[:len(body) // 2])
+    with pytest.raises(ValueError):
+        scanner.close()